@@ -0,0 +1,28 @@
+"""
+Gunicorn settings for serving server.wsgi:app on Linux / macOS
+
+    gunicorn server.wsgi:app
+
+Gunicorn picks this file up automatically from the working directory.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# One worker owns the model; concurrent requests are served by its threads and
+# coalesced into batches by the model manager. Extra workers would each load a
+# full copy of the model, and CUDA weights cannot be shared with forked workers.
+workers = 1
+worker_class = "gthread"
+threads = int(os.environ.get('SERVER_THREADS', 16))
+
+# Load the model in the worker, not the master: CUDA cannot be initialised
+# before fork, so --preload would leave the worker with an unusable context.
+preload_app = False
+
+# Keep browser connections open between requests
+keepalive = 30
+
+# Model loading and long generations outlast gunicorn's 30 second default
+timeout = 300
+graceful_timeout = 30
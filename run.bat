@@ -79,7 +79,7 @@ echo Checking for AMD GPU...
 python -c "import torch; hasattr_hip = hasattr(torch, 'hip'); hip_available = hasattr(torch, 'hip') and torch.hip.is_available() if hasattr_hip else False; print(f'AMD ROCm Available: {hip_available}')"
 
 REM Set environment variables for running the application
-set FLASK_DEBUG=true
+set FLASK_DEBUG=false
 set PORT=5000
 set MODEL_PATH=HPAI-BSC/Llama3.1-Aloe-Beta-8B
 set PYTHONPATH=%PROJECT_DIR%  # Added to include project root in Python path
@@ -100,8 +100,8 @@ echo.
 REM Try to open the web browser automatically
 start "" http://localhost:5000
 
-REM Launch server and keep it running
-python -m server.server
+REM Launch the server under waitress and keep it running
+python -m server.wsgi
 
 echo.
 echo ===================================================
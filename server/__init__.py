@@ -1,17 +1,43 @@
 """
 ClinicalGPT Medical Assistant - Server Package
 This package manages the Flask server, model loading, and API endpoints.
+The in-process Flask server started by server.server is for debugging only;
+deployments should serve server.wsgi:app with waitress or gunicorn.
 """
+import atexit
 import logging
+import logging.handlers
+import queue
+
+# Configure logging. Request threads only enqueue records; a background
+# listener does the console and disk writes so handlers never block a request.
+_log_queue = queue.Queue(-1)
+
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+_file_handler = logging.handlers.RotatingFileHandler(
+    "server_debug.log",
+    maxBytes=10 * 1024 * 1024,
+    backupCount=3
+)
+_file_handler.setFormatter(_log_formatter)
+
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(_log_formatter)
+
+_log_listener = logging.handlers.QueueListener(
+    _log_queue, _file_handler, _stream_handler, respect_handler_level=True
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# The queue handler only merges args into the message; formatting happens in the listener
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
 
-# Configure logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("server_debug.log"),
-        logging.StreamHandler()
-    ]
+    handlers=[_queue_handler]
 )
 
-logger = logging.getLogger(__name__)
\ No newline at end of file
+logger = logging.getLogger(__name__)
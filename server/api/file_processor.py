@@ -2,19 +2,29 @@
 File processing endpoints
 """
 import logging
-import traceback
 from flask import request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
 import torch
 
+from utils.file_processor.processor import process_file, is_supported_file
+
 logger = logging.getLogger(__name__)
 
 def register_file_routes(app, model_manager, device_config):
     """Register file processing endpoints"""
+    # The device never changes after start-up, so build it once
+    main_device = torch.device(device_config['main_device'])
     
     @app.route('/api/process-file', methods=['POST'])
     def handle_file_upload():
         """Process an uploaded file and return the analysis."""
         try:
+            # Reject oversized uploads from the headers alone, before the body is parsed
+            max_length = app.config.get('MAX_CONTENT_LENGTH')
+            if max_length and request.content_length and request.content_length > max_length:
+                logger.warning(f"Rejected upload of {request.content_length} bytes (limit {max_length})")
+                return jsonify({'error': f'File too large (limit {max_length // (1024 * 1024)} MB)'}), 413
+            
             if 'file' not in request.files:
                 logger.warning("No file uploaded in request")
                 return jsonify({'error': 'No file uploaded'}), 400
@@ -24,19 +34,27 @@ def register_file_routes(app, model_manager, device_config):
                 logger.warning("Empty filename in uploaded file")
                 return jsonify({'error': 'No file selected'}), 400
             
+            # File processors drive the transformers model directly
+            if model_manager.backend != 'transformers':
+                logger.warning(f"File analysis requested while using the {model_manager.backend} backend")
+                return jsonify({'error': 'File analysis is not available with the current model backend'}), 503
+            
+            if not is_supported_file(file.filename):
+                logger.warning(f"Unsupported file type uploaded: {file.filename}")
+                return jsonify({'error': 'Unsupported file type'}), 415
+            
             try:
                 logger.info(f"Processing file: {file.filename}")
                 # Process the file based on its type
-                from utils.file_processor.processor import process_file
-                
-                main_device = torch.device(device_config['main_device'])
                 result = process_file(file, model_manager.model, model_manager.tokenizer, main_device)
                 return jsonify(result)
             except Exception as e:
-                logger.error(f"Error processing file: {str(e)}")
-                traceback.print_exc()
+                logger.exception(f"Error processing file: {str(e)}")
                 return jsonify({'error': str(e)}), 500
+        except RequestEntityTooLarge:
+            # Bodies sent without a Content-Length are cut off by Werkzeug while parsing
+            logger.warning("Rejected upload exceeding MAX_CONTENT_LENGTH")
+            return jsonify({'error': 'File too large'}), 413
         except Exception as e:
-            logger.error(f"Unexpected error in handle_file_upload: {str(e)}")
-            traceback.print_exc()
+            logger.exception(f"Unexpected error in handle_file_upload: {str(e)}")
             return jsonify({'error': 'Internal server error'}), 500
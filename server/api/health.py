@@ -4,11 +4,21 @@ Health and status check endpoints
 import logging
 from flask import jsonify
 
+from ..utils.device_detection import get_device_details
+
 logger = logging.getLogger(__name__)
 
 def register_health_routes(app, model_manager, device_config):
     """Register health and status check endpoints"""
     
+    # Device placement is fixed at startup, so build the static part of the device info once
+    device_summary = {
+        'primary_device': device_config['main_device'],
+        'primary_device_weight': f"{device_config['main_weight']*100:.0f}%",
+        'secondary_device': device_config['secondary_device'],
+        'secondary_device_weight': f"{device_config['secondary_weight']*100:.0f}%",
+    }
+    
     @app.route('/api/health', methods=['GET'])
     def health_check():
         """Simple health check endpoint."""
@@ -33,6 +43,7 @@ def register_health_routes(app, model_manager, device_config):
             'endpoints': {
                 '/api/health': 'Health check',
                 '/api/query': 'Process a medical query',
+                '/api/query/stream': 'Process a medical query, streaming the response as server-sent events',
                 '/api/process-file': 'Process a medical file',
                 '/api/detect-medical-terms': 'Detect medical terms in text',
                 '/api/device-info': 'Hardware acceleration details'
@@ -42,13 +53,8 @@ def register_health_routes(app, model_manager, device_config):
     @app.route('/api/device-info', methods=['GET'])
     def device_info():
         """Return detailed information about the devices being used."""
-        from ..utils.device_detection import get_device_details
-        
         info = {
-            'primary_device': device_config['main_device'],
-            'primary_device_weight': f"{device_config['main_weight']*100:.0f}%",
-            'secondary_device': device_config['secondary_device'],
-            'secondary_device_weight': f"{device_config['secondary_weight']*100:.0f}%",
+            **device_summary,
             **get_device_details()
         }
         
@@ -2,9 +2,11 @@
 Medical term detection endpoints
 """
 import logging
-import traceback
 from flask import request, jsonify
 
+from utils.file_processor.medical_terms import detect_medical_terms
+from .schemas import term_detection_decoder, DecodeError
+
 logger = logging.getLogger(__name__)
 
 def register_term_routes(app):
@@ -14,14 +16,10 @@ def register_term_routes(app):
     def detect_medical_terms_endpoint():
         """API endpoint to detect medical terms in provided text."""
         try:
-            data = request.json
-            if 'text' not in data:
-                return jsonify({'error': 'No text provided'}), 400
-            
-            text = data['text']
-            
-            # Import and use the advanced medical term detection function
-            from utils.file_processor.medical_terms import detect_medical_terms
+            try:
+                text = term_detection_decoder.decode(request.get_data()).text
+            except DecodeError as e:
+                return jsonify({'error': f'Invalid request: {str(e)}'}), 400
             
             # Process the text to find medical terms
             medical_terms = detect_medical_terms(text)
@@ -31,6 +29,5 @@ def register_term_routes(app):
             })
             
         except Exception as e:
-            logger.error(f"Error detecting medical terms: {str(e)}")
-            traceback.print_exc()
+            logger.exception(f"Error detecting medical terms: {str(e)}")
             return jsonify({'error': 'Internal server error'}), 500
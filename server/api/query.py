@@ -2,83 +2,136 @@
 Query processing endpoints
 """
 import logging
-import traceback
-from flask import request, jsonify
+from flask import request, jsonify, json, Response, stream_with_context
+
+from utils.web_scraper.core import search_medical_sites
+from .schemas import query_decoder, DecodeError
 
 logger = logging.getLogger(__name__)
 
+def _search_web(data):
+    """Fetch supporting web results for a query, if the client asked for them"""
+    if not data.search_web:
+        return []
+    logger.info("Searching web for medical information first...")
+    search_term = data.search_term or data.query
+    web_results = search_medical_sites(search_term, max_results=5)
+    logger.info(f"Found {len(web_results)} web results")
+    return web_results
+
+def _build_prompt(query, web_results):
+    """Build the model prompt, with web results as extra context when there are any"""
+    if not web_results:
+        # Standard prompt without web information
+        return f"User: {query}\nAssistant:"
+    
+    # Build the whole enhanced prompt from one list of fragments and join once
+    prompt_parts = [
+        "User: ", query,
+        "\n\nPlease use the following up-to-date information in your response:\n",
+        "\n\nInformation from trusted medical sources:\n"
+    ]
+    prompt_parts.extend(
+        f"[Source {i+1}: {result.get('title', 'Medical Information')} "
+        f"from {result.get('source', 'trusted medical source')}]\n"
+        f"{result.get('content', '').strip()}\n\n"
+        for i, result in enumerate(web_results)
+    )
+    prompt_parts.append("\nAssistant:")
+    return "".join(prompt_parts)
+
+def _sse_event(event, payload):
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
 def register_query_routes(app, model_manager, device_config):
     """Register query processing endpoints"""
     
+    def prepare_query():
+        """Decode the request and build the prompt
+        
+        Returns (prompt, web_results, None), or (None, None, error_response)
+        when the request cannot be served.
+        """
+        try:
+            data = query_decoder.decode(request.get_data())
+        except DecodeError as e:
+            logger.warning(f"Invalid query request: {str(e)}")
+            return None, None, (jsonify({'error': f'Invalid request: {str(e)}'}), 400)
+        
+        logger.info(f"Processing query: {data.query[:50]}...")
+        
+        # Check if model is loaded
+        if model_manager.model is None:
+            logger.error("Model not loaded")
+            return None, None, (jsonify({'error': 'Model not loaded properly'}), 500)
+        
+        # First check if we should search the web for information
+        web_results = _search_web(data)
+        prompt = _build_prompt(data.query, web_results)
+        
+        # Skip building debug-only strings when DEBUG logging is off
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Using prompt with length: {len(prompt)}")
+        
+        return prompt, web_results, None
+    
     @app.route('/api/query', methods=['POST'])
     def process_query():
         """Process a text query using the ClinicalGPT model and return the response."""
         try:
-            data = request.json
+            prompt, web_results, error_response = prepare_query()
+            if error_response is not None:
+                return error_response
             
-            if 'query' not in data:
-                logger.warning("API request missing query field")
-                return jsonify({'error': 'No query provided'}), 400
+            response_text = model_manager.generate_response(prompt)
             
-            query = data['query']
-            logger.info(f"Processing query: {query[:50]}...")
+            # Build response with details
+            response = {
+                'model_name': model_manager.model_path,
+                'response': response_text,
+                'web_results': web_results,
+                'device_used': device_config['main_device']
+            }
             
-            # Check if model is loaded
-            if model_manager.model is None:
-                logger.error("Model not loaded")
-                return jsonify({'error': 'Model not loaded properly'}), 500
-            
-            # Process the query with ClinicalGPT
+            return jsonify(response)
+        
+        except Exception as e:
+            logger.exception(f"Error processing query: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/query/stream', methods=['POST'])
+    def process_query_stream():
+        """Process a text query and stream the response as server-sent events
+        
+        A 'meta' event carries the model details and web results, then 'token'
+        events carry the response text as it is generated, ending with 'done'
+        (or 'error' if generation fails part way through).
+        """
+        try:
+            prompt, web_results, error_response = prepare_query()
+            if error_response is not None:
+                return error_response
+        
+        except Exception as e:
+            logger.exception(f"Error processing query: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+        
+        def events():
+            yield _sse_event('meta', {
+                'model_name': model_manager.model_path,
+                'web_results': web_results,
+                'device_used': device_config['main_device']
+            })
             try:
-                # First check if we should search the web for information
-                web_results = []
-                if data.get('search_web', False):
-                    logger.info("Searching web for medical information first...")
-                    from utils.web_scraper.core import search_medical_sites
-                    
-                    search_term = data.get('search_term', query)
-                    web_results = search_medical_sites(search_term, max_results=5)
-                    logger.info(f"Found {len(web_results)} web results")
-                    
-                    # Create an enhanced prompt that includes web information
-                    if web_results:
-                        web_context = "\n\nInformation from trusted medical sources:\n"
-                        for i, result in enumerate(web_results):
-                            title = result.get('title', 'Medical Information')
-                            content = result.get('content', '').strip()
-                            source = result.get('source', 'trusted medical source')
-                            
-                            web_context += f"[Source {i+1}: {title} from {source}]\n{content}\n\n"
-                        
-                        # Create an enhanced prompt that instructs the model to use this information
-                        prompt = f"User: {query}\n\nPlease use the following up-to-date information in your response:\n{web_context}\nAssistant:"
-                    else:
-                        # If no web results, use standard prompt
-                        prompt = f"User: {query}\nAssistant:"
-                else:
-                    # Standard prompt without web search
-                    prompt = f"User: {query}\nAssistant:"
-                
-                logger.debug(f"Using prompt with length: {len(prompt)}")
-                
-                response_text = model_manager.generate_response(prompt)
-                
-                # Build response with details
-                response = {
-                    'model_name': model_manager.model_path,
-                    'response': response_text,
-                    'web_results': web_results,
-                    'device_used': device_config['main_device']
-                }
-                
-                return jsonify(response)
-            
+                for text in model_manager.generate_response_stream(prompt):
+                    if text:
+                        yield _sse_event('token', {'text': text})
+                yield _sse_event('done', {})
             except Exception as e:
-                logger.error(f"Error processing query: {str(e)}")
-                traceback.print_exc()
-                return jsonify({'error': str(e)}), 500
-                
-        except Exception as e:
-            logger.error(f"Unexpected error in process_query: {str(e)}")
-            traceback.print_exc()
-            return jsonify({'error': 'Internal server error'}), 500
+                logger.exception(f"Error streaming response: {str(e)}")
+                yield _sse_event('error', {'error': str(e)})
+        
+        # Proxies must pass events through as they arrive rather than buffering the body
+        headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        return Response(stream_with_context(events()), mimetype='text/event-stream', headers=headers)
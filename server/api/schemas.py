@@ -0,0 +1,23 @@
+"""
+Request body schemas for the JSON API endpoints
+"""
+from typing import Optional
+
+import msgspec
+
+class QueryRequest(msgspec.Struct):
+    """Body of POST /api/query"""
+    query: str
+    search_web: bool = False
+    search_term: Optional[str] = None
+
+class TermDetectionRequest(msgspec.Struct):
+    """Body of POST /api/detect-medical-terms"""
+    text: str
+
+# Decoders are built once so each request only runs the compiled validation
+query_decoder = msgspec.json.Decoder(QueryRequest)
+term_detection_decoder = msgspec.json.Decoder(TermDetectionRequest)
+
+# Base class of both malformed-JSON and schema validation errors
+DecodeError = msgspec.DecodeError
@@ -12,12 +12,48 @@ def load_config():
     config = {
         'model_path': os.environ.get('MODEL_PATH', 'medicalai/ClinicalGPT-base-zh'),
         'port': int(os.environ.get('PORT', 5000)),
+        # Request threads of the WSGI server; generation itself is serialized by the batch scheduler
+        'server_threads': int(os.environ.get('SERVER_THREADS', 16)),
         'debug': os.environ.get('FLASK_DEBUG', 'False').lower() == 'true',
+        'max_upload_mb': int(os.environ.get('MAX_UPLOAD_MB', 25)),
         'device_config': {
             'main_device': None,
             'secondary_device': None,
             'main_weight': 0.85,  # 85% of workload on primary device
-            'secondary_weight': 0.15  # 15% of workload on secondary device
+            'secondary_weight': 0.15,  # 15% of workload on secondary device
+            # Weight precision: auto, float16, bfloat16 or float32
+            'dtype': os.environ.get('MODEL_DTYPE', 'auto'),
+            # Weight quantization: none, 8bit, nf4 or auto (CUDA with bitsandbytes only)
+            'quantization': os.environ.get('MODEL_QUANTIZATION', 'none'),
+            # Run a full gc.collect() after loading the model
+            'aggressive_gc': os.environ.get('AGGRESSIVE_GC', 'False').lower() == 'true'
+        },
+        'generation': {
+            # Upper bound on generated tokens per response, independent of prompt length
+            'max_new_tokens': int(os.environ.get('MAX_NEW_TOKENS', 512)),
+            # Sample with temperature/top-p, or decode greedily when false
+            'do_sample': os.environ.get('DO_SAMPLE', 'True').lower() == 'true',
+            # Concurrent queries arriving within batch_wait_ms share one generate call
+            'max_batch_size': int(os.environ.get('MAX_BATCH_SIZE', 8)),
+            'batch_wait_ms': int(os.environ.get('BATCH_WAIT_MS', 5)),
+            # Batches whose prompt + new tokens exceed this are generated in several passes
+            'max_batch_tokens': int(os.environ.get('MAX_BATCH_TOKENS', 8192)),
+            # Prompts longer than this many tokens are prefilled in chunks (0 disables)
+            'prefill_chunk_size': int(os.environ.get('PREFILL_CHUNK_SIZE', 512)),
+            # KV cache precision: none, int8 or int4 (CUDA with hqq only)
+            'kv_cache_quantization': os.environ.get('KV_CACHE_QUANTIZATION', 'none'),
+            # Compile the model forward with torch.compile: true, false, or auto
+            # (single unquantized CUDA device with PyTorch 2.1+ and Triton). Off by
+            # default: file analysis calls generate() outside the engine's fixed shapes
+            'compile_model': os.environ.get('TORCH_COMPILE', 'false').lower(),
+            # Optional vLLM backend (CUDA only); falls back to transformers when unavailable
+            'use_vllm': os.environ.get('USE_VLLM', 'False').lower() == 'true',
+            'vllm': {
+                'tensor_parallel_size': int(os.environ.get('VLLM_TENSOR_PARALLEL_SIZE', 1)),
+                'gpu_memory_utilization': float(os.environ.get('VLLM_GPU_MEMORY_UTILIZATION', 0.9)),
+                # Sequences vLLM schedules together; also the batch size handed to it per call
+                'max_num_seqs': int(os.environ.get('VLLM_MAX_NUM_SEQS', 64))
+            }
         }
     }
     
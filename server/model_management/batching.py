@@ -0,0 +1,141 @@
+"""
+Request batching for model inference
+Coalesces prompts from concurrent requests into a single batched generate call
+"""
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class BatchScheduler:
+    """Collects prompts from concurrent callers and runs them through the model together
+
+    Decoding is bound by memory bandwidth rather than compute, so generating for
+    several prompts in one pass costs little more than generating for one. Callers
+    submit a prompt and block on the returned future; a single worker thread owns
+    the model and drains the queue in batches.
+    """
+
+    def __init__(self, inference_engine, pipeline_stages=None, max_batch_size=8, max_wait_ms=5):
+        self.inference_engine = inference_engine
+        self.pipeline_stages = pipeline_stages
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        # Engines that can tokenize ahead of time expose encode(); vLLM tokenizes internally
+        # and the pipeline path tokenizes each prompt itself
+        self._encode = getattr(inference_engine, 'encode', None) if pipeline_stages is None else None
+        # Engines that can return raw token ids have them decoded on a separate thread,
+        # so the worker starts the next batch while the last one is turned into text
+        self._decode_pool = None
+        if hasattr(inference_engine, 'generate_batch_tokens') and pipeline_stages is None:
+            self._decode_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-decode")
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+        self._worker.start()
+        logger.info(f"Batch scheduler started (max_batch_size={self.max_batch_size}, max_wait_ms={max_wait_ms})")
+
+    def submit(self, prompt, streamer=None):
+        """Queue a prompt for generation and return a future for the response text
+
+        Prompts with a streamer are batched like any other; each streamer receives
+        only its own row's tokens.
+        """
+        future = Future()
+        # Tokenize on the caller's thread so the worker only pads and generates
+        encoded = self._encode(prompt) if self._encode is not None else None
+        self._queue.put((prompt, encoded, future, streamer))
+        return future
+
+    def generate(self, prompt):
+        """Queue a prompt and wait for its response"""
+        return self.submit(prompt).result()
+
+    def _collect_batch(self):
+        """Block for the first request, then gather more until the batch is full or the window closes"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        """Worker loop that owns all access to the model"""
+        while True:
+            batch = self._collect_batch()
+            if self._decode_pool is not None:
+                # Streamed prompts share the batched generate through per-row streamers
+                streamed = []
+            else:
+                streamed = [item for item in batch if item[3] is not None]
+                batch = [item for item in batch if item[3] is None]
+
+            for prompt, _, future, streamer in streamed:
+                try:
+                    future.set_result(
+                        self.inference_engine.generate_response(prompt, self.pipeline_stages, streamer=streamer)
+                    )
+                except Exception as e:
+                    logger.error(f"Streamed generation failed: {str(e)}")
+                    future.set_exception(e)
+
+            if not batch:
+                continue
+
+            prompts = [prompt for prompt, _, _, _ in batch]
+            encoded = [ids for _, ids, _, _ in batch]
+            futures = [future for _, _, future, _ in batch]
+            streamers = [streamer for _, _, _, streamer in batch]
+
+            try:
+                if self.pipeline_stages is not None:
+                    # The pipeline path decodes one sequence at a time
+                    responses = [
+                        self.inference_engine.generate_response(prompt, self.pipeline_stages)
+                        for prompt in prompts
+                    ]
+                else:
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"Generating batch of {len(prompts)} prompts")
+                    if self._decode_pool is not None:
+                        token_batches = self.inference_engine.generate_batch_tokens(
+                            prompts, encoded=encoded, streamers=streamers if any(streamers) else None
+                        )
+                        self._decode_pool.submit(self._resolve_decoded, token_batches, futures)
+                        continue
+                    if self._encode is not None:
+                        responses = self.inference_engine.generate_batch(prompts, encoded=encoded)
+                    else:
+                        responses = self.inference_engine.generate_batch(prompts)
+
+                for future, response in zip(futures, responses):
+                    future.set_result(response)
+
+            except Exception as e:
+                logger.error(f"Batched generation failed: {str(e)}")
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _resolve_decoded(self, token_batches, futures):
+        """Decode a finished batch and hand each caller its response (runs on the decode thread)"""
+        try:
+            responses = self.inference_engine.decode_generated(token_batches)
+            for future, response in zip(futures, responses):
+                future.set_result(response)
+
+        except Exception as e:
+            logger.error(f"Decoding batched responses failed: {str(e)}")
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
@@ -5,24 +5,31 @@ from .base_strategy import DistributionStrategy
 from .model_parallelism import ModelParallelismStrategy
 from .pipeline_parallelism import PipelineParallelismStrategy
 from .layer_offloading import LayerOffloadingStrategy
+from .auto_device_map import AutoDeviceMapStrategy, HAS_ACCELERATE
+
+# Constant mapping of strategy names to classes, built once at import
+_STRATEGIES = {
+    'model_parallelism': ModelParallelismStrategy,
+    'pipeline_parallelism': PipelineParallelismStrategy,
+    'layer_offloading': LayerOffloadingStrategy,
+    'auto_device_map': AutoDeviceMapStrategy
+}
 
 def get_strategy(strategy_type, model, device_config):
     """Factory function to get the appropriate distribution strategy"""
-    strategies = {
-        'model_parallelism': ModelParallelismStrategy,
-        'pipeline_parallelism': PipelineParallelismStrategy,
-        'layer_offloading': LayerOffloadingStrategy
-    }
-    
-    if strategy_type not in strategies:
-        raise ValueError(f"Unknown strategy type: {strategy_type}")
+    try:
+        strategy_class = _STRATEGIES[strategy_type]
+    except KeyError:
+        raise ValueError(f"Unknown strategy type: {strategy_type}") from None
         
-    return strategies[strategy_type](model, device_config)
+    return strategy_class(model, device_config)
 
 __all__ = [
     'DistributionStrategy',
     'ModelParallelismStrategy',
     'PipelineParallelismStrategy', 
     'LayerOffloadingStrategy',
+    'AutoDeviceMapStrategy',
+    'HAS_ACCELERATE',
     'get_strategy'
 ]
@@ -0,0 +1,58 @@
+"""
+Accelerate-based device map strategy implementation
+"""
+import logging
+from .base_strategy import DistributionStrategy
+
+# Try to import accelerate (optional, falls back to the hand-written strategies)
+try:
+    from accelerate import infer_auto_device_map, dispatch_model
+    from accelerate.utils import get_max_memory
+    HAS_ACCELERATE = True
+except ImportError:
+    HAS_ACCELERATE = False
+
+logger = logging.getLogger(__name__)
+
+class AutoDeviceMapStrategy(DistributionStrategy):
+    """
+    Places the model with accelerate's device map inference.
+    Whole decoder blocks fill the GPU first and the rest is offloaded to the CPU;
+    accelerate's hooks move activations between devices during generate().
+    """
+    
+    # Share of free GPU memory given to weights; the rest is left for the KV cache and activations
+    GPU_MEMORY_FRACTION = 0.85
+    
+    def apply(self):
+        """Apply the accelerate device map distribution strategy"""
+        logger.info("Setting up accelerate device map across devices")
+        
+        try:
+            max_memory = get_max_memory()
+            gpu_index = self.primary_device.index or 0
+            max_memory = {
+                gpu_index: int(max_memory[gpu_index] * self.GPU_MEMORY_FRACTION),
+                'cpu': max_memory['cpu']
+            }
+            
+            # Decoder blocks are never split across devices
+            no_split_modules = getattr(self.model, '_no_split_modules', None) or []
+            device_map = infer_auto_device_map(
+                self.model,
+                max_memory=max_memory,
+                no_split_module_classes=no_split_modules
+            )
+            dispatch_model(self.model, device_map=device_map)
+            
+            devices = set(device_map.values())
+            self.is_sharded = len(devices) > 1
+            logger.info(f"Accelerate device map configured over {sorted(map(str, devices))} "
+                       f"({len(device_map)} module groups)")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Failed to set up accelerate device map: {str(e)}")
+            # Fall back to moving the whole model to the primary device
+            self.model.to(self.primary_device)
+            return False
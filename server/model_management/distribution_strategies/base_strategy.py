@@ -2,10 +2,18 @@
 Base class for model distribution strategies
 """
 import logging
+import itertools
 import torch
 
 logger = logging.getLogger(__name__)
 
+# Attribute paths of the decoder block list and the final norm in common causal LM layouts
+DECODER_LAYOUTS = (
+    ('transformer.h', 'transformer.ln_f'),                # GPT-2, GPT-J, BLOOM
+    ('model.layers', 'model.norm'),                       # LLaMA, Mistral, Qwen
+    ('gpt_neox.layers', 'gpt_neox.final_layer_norm'),     # GPT-NeoX, Pythia
+)
+
 class DistributionStrategy:
     """Base class for model distribution strategies"""
     
@@ -28,3 +36,68 @@ class DistributionStrategy:
     def is_model_sharded(self):
         """Return whether the model is sharded across devices"""
         return self.is_sharded
+    
+    def _find_decoder_blocks(self):
+        """Return the model's decoder block list and final norm, or (None, None) if not recognised"""
+        for blocks_path, norm_path in DECODER_LAYOUTS:
+            try:
+                return self.model.get_submodule(blocks_path), self.model.get_submodule(norm_path)
+            except AttributeError:
+                continue
+        return None, None
+    
+    @staticmethod
+    def _is_on_device(module, device):
+        """Check whether every parameter and buffer of a module already lives on a device"""
+        for tensor in itertools.chain(module.parameters(), module.buffers()):
+            # torch.device('cuda') has no index and should match any tensor on cuda:N
+            if tensor.device.type != device.type:
+                return False
+            if device.index is not None and tensor.device.index != device.index:
+                return False
+        return True
+    
+    def _move_module(self, module, device):
+        """Move a module to a device, skipping the copy if it is already there
+
+        Returns True if the module was moved.
+        """
+        if self._is_on_device(module, device):
+            return False
+        module.to(device)
+        return True
+    
+    @staticmethod
+    def _align_inputs_to_module(module):
+        """Register a hook that moves a module's tensor inputs onto the module's device
+
+        Lets the model's own forward run across a device boundary. Every module
+        on the far side of a boundary needs the hook, not just the first one: the
+        model's layer loop hands each block the same attention mask, cache
+        positions and rotary (cos, sin) tuple, all built on the primary device.
+        The device is read at call time, so the hook stays correct if the module
+        is moved later.
+        """
+        def align_inputs(mod, args, kwargs):
+            device = next(mod.parameters()).device
+            # Copies onto a GPU are ordered before the module's kernels on the same stream,
+            # so they need not block; copies to the CPU must finish before it reads them
+            non_blocking = device.type == 'cuda'
+            args = _move_tensors(args, device, non_blocking)
+            kwargs = {key: _move_tensors(val, device, non_blocking) for key, val in kwargs.items()}
+            return args, kwargs
+        
+        return module.register_forward_pre_hook(align_inputs, with_kwargs=True)
+
+def _move_tensors(value, device, non_blocking):
+    """Move a tensor, or the tensors inside nested tuples and lists, to a device
+
+    Anything else (caches, flags, None) is returned unchanged.
+    """
+    if torch.is_tensor(value):
+        return value.to(device, non_blocking=non_blocking)
+    if isinstance(value, (tuple, list)):
+        items = [_move_tensors(item, device, non_blocking) for item in value]
+        # Named tuples take their fields positionally
+        return type(value)(*items) if hasattr(value, '_fields') else type(value)(items)
+    return value
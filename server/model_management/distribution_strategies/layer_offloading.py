@@ -19,31 +19,18 @@ class LayerOffloadingStrategy(DistributionStrategy):
         logger.info("Setting up partial layer offloading")
         
         try:
-            # Move the entire model to the secondary device first
-            self.model.to(self.secondary_device)
-            
-            # Then selectively move critical components back to the primary device
-            offload_count = 0
-            
-            # For transformer models, keep attention layers on primary device
-            for name, module in self.model.named_modules():
-                # Keep attention mechanisms on the primary device for better performance
-                if any(attention_part in name.lower() for attention_part in ['attn', 'attention', 'self']):
-                    try:
-                        module.to(self.primary_device)
-                        offload_count += 1
-                    except Exception as e:
-                        logger.debug(f"Could not move module {name} to primary device: {str(e)}")
-            
-            # Also keep token embeddings on primary device for faster inference starts
+            # Attention blocks, token embeddings and the LM head run on the primary device
+            primary_modules = [module for _, module in self._find_attention_modules()]
             if hasattr(self.model, 'get_input_embeddings'):
-                self.model.get_input_embeddings().to(self.primary_device)
-                offload_count += 1
-                
-            # Keep LM head on primary device for faster final predictions
+                primary_modules.append(self.model.get_input_embeddings())
             if hasattr(self.model, 'get_output_embeddings') and self.model.get_output_embeddings() is not None:
-                self.model.get_output_embeddings().to(self.primary_device)
-                offload_count += 1
+                primary_modules.append(self.model.get_output_embeddings())
+            
+            # Place every tensor on its final device in one pass, instead of moving the
+            # whole model to the secondary device and then moving pieces back
+            primary_ids = {id(module) for module in primary_modules}
+            self._place_module(self.model, self.secondary_device, primary_ids)
+            offload_count = len(primary_ids)
             
             logger.info(f"Partial layer offloading configured: {offload_count} critical modules on {self.primary_device}, "
                        f"rest of model on {self.secondary_device}")
@@ -55,3 +42,43 @@ class LayerOffloadingStrategy(DistributionStrategy):
             # Fall back to moving the whole model to the primary device
             self.model.to(self.primary_device)
             return False
+    
+    def _find_attention_modules(self):
+        """Collect the outermost attention blocks of the model in a single pass
+
+        Attention classes are matched by class name (LlamaAttention, GPT2Attention,
+        BertSelfAttention, ...) so this works across architectures without importing
+        each model's module. Submodules of an already-selected block are skipped.
+        """
+        attention_modules = []
+        selected_prefix = None
+        
+        # named_modules() walks the tree depth-first, so descendants follow their parent
+        for name, module in self.model.named_modules():
+            if selected_prefix is not None and name.startswith(selected_prefix):
+                continue
+            if type(module).__name__.endswith('Attention'):
+                attention_modules.append((name, module))
+                selected_prefix = name + '.'
+        
+        logger.debug(f"Found {len(attention_modules)} attention modules to keep on {self.primary_device}")
+        return attention_modules
+    
+    def _place_module(self, module, device, primary_ids):
+        """Move a module's own tensors to their target device, then recurse into its children
+
+        Modules in primary_ids, and everything below them, go to the primary device.
+        Each tensor is copied at most once; tied weights are only moved the first time.
+        """
+        if id(module) in primary_ids:
+            device = self.primary_device
+        
+        for param in module.parameters(recurse=False):
+            if param.device != device:
+                param.data = param.data.to(device)
+        for name, buf in module.named_buffers(recurse=False):
+            if buf.device != device:
+                module._buffers[name] = buf.to(device)
+        
+        for child in module.children():
+            self._place_module(child, device, primary_ids)
@@ -1,9 +1,9 @@
 """
 Model parallelism strategy implementation
 """
+import bisect
+import itertools
 import logging
-import torch
-import math
 from .base_strategy import DistributionStrategy
 
 logger = logging.getLogger(__name__)
@@ -18,27 +18,54 @@ class ModelParallelismStrategy(DistributionStrategy):
         """Apply model parallelism distribution strategy"""
         logger.info("Setting up model parallelism across devices")
         
-        # Get all model modules that can be distributed
-        all_layers = list(self.model.children())
+        blocks, final_norm = self._find_decoder_blocks()
+        if blocks is None:
+            logger.warning("Model parallelism not supported for this model architecture; using primary device only")
+            self.model.to(self.primary_device)
+            return False
         
-        # Calculate split ratio based on device weights
-        primary_ratio = self.device_config['main_weight']
-        primary_layers_count = math.ceil(len(all_layers) * primary_ratio)
+        # Split the decoder stack so the primary device holds main_weight of its bytes
+        block_sizes = [sum(p.numel() * p.element_size() for p in block.parameters()) for block in blocks]
+        target_bytes = sum(block_sizes) * self.device_config['main_weight']
+        primary_blocks_count = bisect.bisect_right(list(itertools.accumulate(block_sizes)), target_bytes)
+        primary_blocks_count = min(max(primary_blocks_count, 1), len(blocks))
         
-        # Distribute model components across devices
-        for i, layer in enumerate(all_layers):
-            # Place early layers on primary device, later layers on secondary
-            target_device = self.primary_device if i < primary_layers_count else self.secondary_device
-            
-            # Some modules may not have a .to() method or parameters, so handle this safely
+        # Each block is moved straight to its device so the full model never has to fit on one.
+        # Embeddings, final norm and LM head stay on the primary device with the early blocks
+        self._place_outside_blocks(self.model, blocks, self.primary_device)
+        for i, block in enumerate(blocks):
+            target_device = self.primary_device if i < primary_blocks_count else self.secondary_device
             try:
-                layer.to(target_device)
-                logger.debug(f"Layer {i} moved to {target_device}")
+                if self._move_module(block, target_device):
+                    logger.debug(f"Layer {i} moved to {target_device}")
             except Exception as e:
                 logger.warning(f"Failed to move layer {i} to {target_device}: {str(e)}")
         
+        # Every secondary block receives the mask and rotary embeddings built on the primary
+        # device, and the final norm takes hidden states back across the split
+        if primary_blocks_count < len(blocks):
+            for block in blocks[primary_blocks_count:]:
+                self._align_inputs_to_module(block)
+            self._align_inputs_to_module(final_norm)
+        
         self.is_sharded = True
-        logger.info(f"Model parallelism configured: {primary_layers_count} layers on {self.primary_device}, "
-                   f"{len(all_layers) - primary_layers_count} layers on {self.secondary_device}")
+        logger.info(f"Model parallelism configured: {primary_blocks_count} layers on {self.primary_device}, "
+                   f"{len(blocks) - primary_blocks_count} layers on {self.secondary_device}")
                    
         return True
+    
+    def _place_outside_blocks(self, module, blocks, device):
+        """Move everything except the decoder block list to a device"""
+        for child in module.children():
+            if child is blocks:
+                continue
+            if any(descendant is blocks for descendant in child.modules()):
+                self._place_outside_blocks(child, blocks, device)
+            else:
+                self._move_module(child, device)
+        
+        # Containers on the path to the blocks may hold tensors of their own
+        for param in module.parameters(recurse=False):
+            param.data = param.data.to(device)
+        for name, buf in module.named_buffers(recurse=False):
+            module._buffers[name] = buf.to(device)
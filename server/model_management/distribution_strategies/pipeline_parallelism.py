@@ -37,6 +37,11 @@ class PipelineParallelismStrategy(DistributionStrategy):
                     'output_head': self.model.transformer.ln_f.to(self.secondary_device)
                 }
                 
+                # Every late block gets its hidden states and the primary-device attention mask moved across
+                for block in decoder_layers[split_point:]:
+                    self._align_inputs_to_module(block)
+                self._align_inputs_to_module(self.model.transformer.ln_f)
+                
                 logger.info(f"Pipeline parallelism configured with split at layer {split_point} of {len(decoder_layers)}")
                 return True
             
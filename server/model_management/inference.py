@@ -1,104 +1,621 @@
 """
 Handles model inference operations
 """
+import time
 import logging
+import threading
+import functools
+import importlib.util
 import torch
+from transformers import (
+    DynamicCache, LogitsProcessorList, TemperatureLogitsWarper, TopPLogitsWarper,
+    StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+)
 
 logger = logging.getLogger(__name__)
 
+class StopAtLength(StoppingCriteria):
+    """Stop generation at a total length without changing max_length
+    
+    generate() sizes a static cache from max_length, so limiting new tokens this
+    way keeps the cache shape identical across requests.
+    """
+    
+    def __init__(self, stop_length):
+        self.stop_length = stop_length
+    
+    def __call__(self, input_ids, scores, **kwargs):
+        done = input_ids.shape[1] >= self.stop_length
+        return torch.full((input_ids.shape[0],), done, dtype=torch.bool, device=input_ids.device)
+
+class ResponseStreamer(TextIteratorStreamer):
+    """Text iterator for one streamed response, which its consumer can cancel
+    
+    Setting cancelled (e.g. when the client disconnects) stops generation for
+    this response's row at the next step without affecting other rows.
+    """
+    
+    def __init__(self, tokenizer):
+        super().__init__(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        self.cancelled = False
+
+class BatchStreamer:
+    """Fans the tokens of one batched generate() call out to per-row streamers
+    
+    generate() accepts a single streamer and hands it every step's tokens for
+    the whole batch. Rows whose streamer is None are not streamed; a row stops
+    receiving tokens once it has produced EOS.
+    """
+    
+    def __init__(self, streamers, eos_token_id):
+        self.streamers = streamers
+        self.eos_token_id = eos_token_id
+        self._prompt_pending = True
+        self._finished = [streamer is None for streamer in streamers]
+    
+    def put(self, value):
+        if self._prompt_pending:
+            # The first call carries the prompts, which each row streamer skips
+            self._prompt_pending = False
+            for row, streamer in enumerate(self.streamers):
+                if streamer is not None:
+                    streamer.put(value[row:row + 1])
+            return
+        
+        for row, streamer in enumerate(self.streamers):
+            if self._finished[row]:
+                continue
+            token = value[row:row + 1]
+            streamer.put(token)
+            if token.item() == self.eos_token_id:
+                self._finished[row] = True
+    
+    def end(self):
+        for streamer in self.streamers:
+            if streamer is not None:
+                streamer.end()
+
+class StopCancelledRows(StoppingCriteria):
+    """Finish the rows whose streamed response has been cancelled by its consumer"""
+    
+    def __init__(self, streamers):
+        self.streamers = streamers
+    
+    def __call__(self, input_ids, scores, **kwargs):
+        cancelled = [streamer is not None and streamer.cancelled for streamer in self.streamers]
+        return torch.tensor(cancelled, dtype=torch.bool, device=input_ids.device)
+
 class InferenceEngine:
     """Handles generation and inference with language models"""
     
-    def __init__(self, model, tokenizer, device_config):
+    # The pipeline decode loop syncs with the host to test for EOS only this often
+    EOS_CHECK_INTERVAL = 16
+    # Prompts are truncated to this many tokens
+    MAX_PROMPT_TOKENS = 1024
+    # A compiled model sees prompts left-padded to one of these lengths, so prefill
+    # only ever runs a handful of shapes instead of recompiling for every length
+    PROMPT_LENGTH_BUCKETS = (128, 256, 512, 1024)
+    # Token ids of this many recent single prompts are kept, so repeated queries skip tokenization
+    ENCODE_CACHE_SIZE = 4096
+    # Cached but unused GPU memory is handed back to the driver only above this many bytes,
+    # and at most once per interval
+    CACHE_TRIM_THRESHOLD_BYTES = 1024**3
+    CACHE_TRIM_MIN_INTERVAL_S = 30.0
+    
+    def __init__(self, model, tokenizer, device_config, generation_config=None, compiled=False):
         self.model = model
         self.tokenizer = tokenizer
         self.device_config = device_config
+        self.generation_config = generation_config or {}
         self.main_device = torch.device(device_config['main_device'])
+        # Prompts longer than this are prefilled in slices to bound peak activation memory
+        self.prefill_chunk_size = self.generation_config.get('prefill_chunk_size', 0)
+        # Length and sampling settings shared by generate() and the pipeline decode loop
+        self.max_new_tokens = self.generation_config.get('max_new_tokens', 512)
+        self.do_sample = self.generation_config.get('do_sample', True)
+        # Upper bound on prompt plus new tokens across one batched generate call
+        self.max_batch_tokens = self.generation_config.get('max_batch_tokens', 8192)
+        # A compiled model sees batches padded to one of these sizes: powers of two up to the scheduler's limit
+        max_batch_size = max(1, self.generation_config.get('max_batch_size', 1))
+        self.batch_size_buckets = tuple(
+            size for size in (2 ** power for power in range(max_batch_size.bit_length())) if size < max_batch_size
+        ) + (max_batch_size,)
+        self.temperature = 0.6
+        self.top_p = 0.9
+        # generate() arguments for a quantized KV cache, or None for the default cache
+        self.kv_cache_kwargs = self._get_kv_cache_kwargs()
+        # A compiled forward needs fixed cache shapes to capture and replay CUDA graphs
+        self.compiled = compiled
+        # Side stream for host-to-device input copies, so they do not queue behind running kernels
+        self._h2d_stream = torch.cuda.Stream() if self.main_device.type == 'cuda' else None
+        # Reusable pinned staging buffers for those copies, and an event marking when they were last read
+        self._pinned_buffers = {}
+        self._h2d_done = torch.cuda.Event() if self._h2d_stream is not None else None
+        # Request threads may call in concurrently when no batch scheduler serializes them
+        self._h2d_lock = threading.Lock()
+        # Per-engine cache of tokenized prompts; ids are stored as tuples so no caller can mutate them
+        self._encode_one = functools.lru_cache(maxsize=self.ENCODE_CACHE_SIZE)(self._tokenize_one)
+        self._last_cache_trim = time.monotonic()
+        
+        # Batched prompts are left-padded so every sequence ends at the generation point
+        self.eos_token_id = None
+        self.pad_token_id = None
+        if self.tokenizer is not None:
+            self.tokenizer.padding_side = 'left'
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            # Special token ids are resolved once instead of through tokenizer properties per request
+            self.eos_token_id = self.tokenizer.eos_token_id
+            self.pad_token_id = self.tokenizer.pad_token_id
         
-    def generate_response(self, prompt, pipeline_stages=None):
-        """Generate a response from the model"""
+    def generate_response(self, prompt, pipeline_stages=None, streamer=None):
+        """Generate a response from the model
+        
+        If a streamer from create_streamer() is given, the response text is also
+        pushed to it as tokens are generated.
+        """
         try:
             if self.model is None or self.tokenizer is None:
                 raise ValueError("Model or tokenizer not loaded")
             
             # Tokenize and prepare input
-            inputs = self.tokenizer(prompt, return_tensors="pt", padding=True, truncation=True, max_length=1024)
+            # A single prompt needs no padding
+            inputs = self.tokenizer(
+                prompt, return_tensors="pt", truncation=True, max_length=self.MAX_PROMPT_TOKENS,
+                return_attention_mask=True, return_token_type_ids=False
+            )
+            if self.compiled and pipeline_stages is None:
+                inputs = self._pad_to_length(inputs, self._bucket_length(inputs["input_ids"].shape[1]))
             
             # Move inputs to main device
-            inputs = {key: val.to(self.main_device) for key, val in inputs.items()}
+            inputs = self._move_inputs(inputs)
             
             logger.debug("Generating response...")
             # Generate response with the causal language model
-            with torch.no_grad():
+            with torch.inference_mode():
                 # If we're using pipeline parallelism, handle it differently
                 if pipeline_stages is not None:
                     # Custom forward pass through pipeline stages
                     output = self._pipeline_generate(inputs["input_ids"], pipeline_stages)
+                    if streamer is not None:
+                        # The pipeline loop has no streamer hook, so the response arrives in one piece
+                        streamer.put(inputs["input_ids"].cpu())
+                        streamer.put(output[:, inputs["input_ids"].shape[1]:].cpu())
+                        streamer.end()
                 else:
                     # Standard generation
-                    output = self.model.generate(
-                        inputs["input_ids"],
-                        max_length=1024,
-                        do_sample=True,
-                        top_p=0.9,
-                        temperature=0.6,
-                        num_return_sequences=1
-                    )
+                    output = self._generate(inputs, streamers=[streamer] if streamer is not None else None)
+            self._release_generation_memory()
             
             logger.debug("Decoding generated response...")
-            # Decode the generated response
-            generated_text = self.tokenizer.decode(output[0], skip_special_tokens=True)
-            
-            # Extract just the response part (after "Assistant:")
-            response_text = generated_text.split("Assistant:", 1)[-1].strip()
+            # Decode only the generated tokens; the prompt ends at "Assistant:"
+            prompt_length = inputs["input_ids"].shape[1]
+            response_text = self.tokenizer.decode(output[0, prompt_length:], skip_special_tokens=True).strip()
             logger.info(f"Generated response: {response_text[:50]}...")
             
             return response_text
             
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
+            if streamer is not None:
+                # Unblock the consumer; the error is raised to whoever waits on the result
+                streamer.end()
             raise
-            
-    def _pipeline_generate(self, input_ids, pipeline_stages):
-        """Custom generation logic for pipeline parallelism"""
+    
+    def generate_batch(self, prompts, encoded=None):
+        """Generate responses for several prompts with a single generate call
+        
+        encoded may hold the token ids encode() already produced for the prompts,
+        so callers can tokenize on their own threads before the batch is formed.
+        """
+        return self.decode_generated(self.generate_batch_tokens(prompts, encoded))
+    
+    def generate_batch_tokens(self, prompts, encoded=None, streamers=None):
+        """Run batched generation and return the new token ids on the CPU, undecoded
+        
+        Returns one tensor per generate pass; decode_generated() turns them into
+        response strings, possibly on another thread. streamers may give a
+        create_streamer() streamer (or None) per prompt, so streamed responses
+        are generated in the same batch as the rest.
+        """
         try:
-            # We'll implement a simple auto-regressive generation
-            current_ids = input_ids.clone()
-            max_length = 1024
-            
-            while current_ids.size(1) < max_length:
-                # Process through pipeline stages
-                embeddings = pipeline_stages['embeddings'](current_ids)
-                if 'pos_embeddings' in pipeline_stages:
-                    position_ids = torch.arange(0, current_ids.size(1), dtype=torch.long,
-                                            device=current_ids.device)
-                    position_embeddings = pipeline_stages['pos_embeddings'](position_ids)
-                    hidden_states = embeddings + position_embeddings
-                else:
-                    hidden_states = embeddings
+            if self.model is None or self.tokenizer is None:
+                raise ValueError("Model or tokenizer not loaded")
+            
+            if encoded is None:
+                encoded = self.encode(prompts)
+            # Left padding keeps every prompt aligned at the end
+            inputs = self._left_pad(encoded)
+            if self.compiled:
+                inputs = self._pad_to_length(inputs, self._bucket_length(inputs["input_ids"].shape[1]))
+            
+            # Cap the tokens a single generate call holds in its KV cache; oversized batches run in passes
+            prompt_length = inputs["input_ids"].shape[1]
+            rows_per_pass = self._rows_per_pass(prompt_length)
+            
+            token_batches = []
+            for start in range(0, len(encoded), rows_per_pass):
+                pass_inputs = {key: val[start:start + rows_per_pass] for key, val in inputs.items()}
+                pass_rows = pass_inputs["input_ids"].shape[0]
+                if self.compiled:
+                    pass_inputs = self._pad_rows(pass_inputs, self._bucket_batch_size(pass_rows))
+                batch_inputs = self._move_inputs(pass_inputs)
+                
+                pass_streamers = streamers[start:start + rows_per_pass] if streamers else None
+                if pass_streamers is not None and not any(pass_streamers):
+                    pass_streamers = None
+                if pass_streamers is not None:
+                    # Filler rows are never streamed
+                    pass_streamers = pass_streamers + [None] * (batch_inputs["input_ids"].shape[0] - pass_rows)
                 
-                # Process through early layers on primary device
-                hidden_states = pipeline_stages['early_layers'](hidden_states)
+                with torch.inference_mode():
+                    output = self._generate(batch_inputs, streamers=pass_streamers)
                 
-                # Transfer to secondary device for late layers
-                hidden_states = hidden_states.to(pipeline_stages['late_layers'].device)
-                hidden_states = pipeline_stages['late_layers'](hidden_states)
+                # Left padding gives every prompt the same length, so one slice drops them all
+                token_batches.append(output[:pass_rows, prompt_length:].cpu())
+            self._release_generation_memory()
+            
+            logger.info(f"Generated {len(encoded)} responses in one batch")
+            
+            return token_batches
+            
+        except Exception as e:
+            logger.error(f"Error generating batched responses: {str(e)}")
+            # Unblock streamed consumers; the error reaches them through their futures
+            for streamer in streamers or ():
+                if streamer is not None:
+                    streamer.end()
+            raise
+    
+    def decode_generated(self, token_batches):
+        """Decode token batches from generate_batch_tokens() into response strings"""
+        responses = []
+        for tokens in token_batches:
+            generated_texts = self.tokenizer.batch_decode(tokens, skip_special_tokens=True)
+            responses.extend(text.strip() for text in generated_texts)
+        return responses
+    
+    def encode(self, prompts):
+        """Tokenize a prompt, or a list of prompts, into unpadded sequences of token ids
+        
+        Single prompts go through an LRU cache, since identical questions are common.
+        """
+        if isinstance(prompts, str):
+            return self._encode_one(prompts)
+        return self.tokenizer(
+            prompts, truncation=True, max_length=self.MAX_PROMPT_TOKENS,
+            return_attention_mask=False, return_token_type_ids=False
+        )["input_ids"]
+    
+    def _tokenize_one(self, prompt):
+        """Tokenize a single prompt to a tuple of token ids (wrapped by the encode cache)"""
+        return tuple(self.tokenizer(
+            prompt, truncation=True, max_length=self.MAX_PROMPT_TOKENS,
+            return_attention_mask=False, return_token_type_ids=False
+        )["input_ids"])
+    
+    def _left_pad(self, encoded):
+        """Stack token id lists into left-padded input_ids and attention_mask tensors"""
+        longest = max(len(ids) for ids in encoded)
+        input_ids = torch.full((len(encoded), longest), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(encoded), longest), dtype=torch.long)
+        for row, ids in enumerate(encoded):
+            if ids:
+                input_ids[row, longest - len(ids):] = torch.tensor(ids, dtype=torch.long)
+                attention_mask[row, longest - len(ids):] = 1
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
+    
+    def create_streamer(self):
+        """Create a streamer that yields response text while generate_response runs
+        
+        The prompt is skipped, so only newly generated text comes out of the iterator.
+        """
+        return ResponseStreamer(self.tokenizer)
+    
+    def warmup(self, num_tokens=8):
+        """Run a short throwaway generation so one-off setup such as compilation happens now
+        
+        A static cache gets the same shape real requests use; only the number of
+        new tokens is smaller. A compiled model is warmed up once per prompt
+        length and batch size bucket that a pass can run, so no request
+        triggers a compile.
+        """
+        inputs = self.tokenizer("User: Hello\nAssistant:", return_tensors="pt", return_token_type_ids=False)
+        if not self.compiled:
+            with torch.inference_mode():
+                self._generate(self._move_inputs(inputs), max_new_tokens=num_tokens)
+            return
+        
+        # Each prefill shape and each decode batch size compiles its own graph; keep them all
+        # instead of falling back to eager once dynamo's default recompile limit is reached
+        graph_count = (len(self.PROMPT_LENGTH_BUCKETS) + 1) * len(self.batch_size_buckets)
+        torch._dynamo.config.cache_size_limit = max(torch._dynamo.config.cache_size_limit, graph_count)
+        
+        for length in self.PROMPT_LENGTH_BUCKETS:
+            length_inputs = self._pad_to_length(inputs, length)
+            for rows in self.batch_size_buckets:
+                if rows > self._rows_per_pass(length):
+                    break
+                with torch.inference_mode():
+                    self._generate(self._move_inputs(self._pad_rows(length_inputs, rows)), max_new_tokens=num_tokens)
+    
+    def _rows_per_pass(self, prompt_length):
+        """Most prompts of this padded length one generate pass may hold within max_batch_tokens"""
+        rows = max(1, self.max_batch_tokens // (prompt_length + self.max_new_tokens))
+        if self.compiled:
+            # Round down to a batch size bucket so every pass is one of the warmed-up shapes
+            rows = max(size for size in self.batch_size_buckets if size <= rows)
+        return rows
+    
+    def _bucket_batch_size(self, rows):
+        """Smallest batch size bucket that fits rows prompts"""
+        for bucket in self.batch_size_buckets:
+            if bucket >= rows:
+                return bucket
+        return rows
+    
+    def _pad_rows(self, inputs, rows):
+        """Repeat the first prompt until inputs hold rows prompts; callers drop the copies' output"""
+        extra = rows - inputs["input_ids"].shape[0]
+        if extra <= 0:
+            return inputs
+        return {key: torch.cat([val, val[:1].expand(extra, -1)]) for key, val in inputs.items()}
+    
+    def _bucket_length(self, length):
+        """Smallest prompt length bucket that fits length tokens"""
+        for bucket in self.PROMPT_LENGTH_BUCKETS:
+            if bucket >= length:
+                return bucket
+        return length
+    
+    def _pad_to_length(self, inputs, length):
+        """Left-pad tokenized inputs on the host to the given sequence length"""
+        pad = length - inputs["input_ids"].shape[1]
+        if pad <= 0:
+            return inputs
+        return {
+            "input_ids": torch.nn.functional.pad(inputs["input_ids"], (pad, 0), value=self.pad_token_id),
+            "attention_mask": torch.nn.functional.pad(inputs["attention_mask"], (pad, 0), value=0)
+        }
+    
+    def _move_inputs(self, inputs):
+        """Copy tokenized inputs to the main device
+        
+        On CUDA the tensors are staged in reused pinned buffers and copied
+        asynchronously on a side stream; the compute stream waits on that stream
+        before generation uses them.
+        """
+        if self._h2d_stream is None:
+            return {key: val.to(self.main_device) for key, val in inputs.items()}
+        
+        with self._h2d_lock:
+            # The previous request's copies must have read the staging buffers before they are overwritten
+            self._h2d_done.synchronize()
+            with torch.cuda.stream(self._h2d_stream):
+                moved = {key: self._stage_pinned(key, val).to(self.main_device, non_blocking=True) for key, val in inputs.items()}
+                self._h2d_done.record()
+        
+        compute_stream = torch.cuda.current_stream()
+        compute_stream.wait_stream(self._h2d_stream)
+        # The copies were allocated on the side stream but are consumed on the compute stream
+        for val in moved.values():
+            val.record_stream(compute_stream)
+        return moved
+    
+    def _stage_pinned(self, key, tensor):
+        """Copy a CPU tensor into the pinned buffer kept for this input name
+        
+        Pinning memory is slow, so each buffer is allocated once (sized for a full
+        batch of maximum-length prompts) and only grown if an input does not fit.
+        The staged view is contiguous, so the device copy stays a single DMA.
+        """
+        buffer = self._pinned_buffers.get(key)
+        numel = tensor.numel()
+        if buffer is None or buffer.dtype != tensor.dtype or buffer.numel() < numel:
+            capacity = max(numel, self.generation_config.get('max_batch_size', 1) * self.MAX_PROMPT_TOKENS)
+            buffer = torch.empty(capacity, dtype=tensor.dtype, pin_memory=True)
+            self._pinned_buffers[key] = buffer
+        
+        staged = buffer[:numel].view(tensor.shape)
+        staged.copy_(tensor)
+        return staged
+    
+    def _release_generation_memory(self):
+        """Return cached GPU memory after a request, but only when a lot of it sits idle
+        
+        empty_cache synchronizes the device and makes the next request go back to
+        cudaMalloc, so it must never run unconditionally per request. It runs only
+        when reserved-but-unallocated memory exceeds CACHE_TRIM_THRESHOLD_BYTES,
+        and no more than once every CACHE_TRIM_MIN_INTERVAL_S seconds.
+        """
+        if self.main_device.type != 'cuda':
+            return
+        now = time.monotonic()
+        if now - self._last_cache_trim < self.CACHE_TRIM_MIN_INTERVAL_S:
+            return
+        idle_bytes = torch.cuda.memory_reserved(self.main_device) - torch.cuda.memory_allocated(self.main_device)
+        if idle_bytes > self.CACHE_TRIM_THRESHOLD_BYTES:
+            torch.cuda.empty_cache()
+            self._last_cache_trim = now
+    
+    def _generate(self, inputs, max_new_tokens=None, streamers=None):
+        """Run model.generate on tokenized inputs, prefilling long prompts in chunks
+        
+        streamers holds a response streamer (or None) for each row to stream.
+        """
+        max_new_tokens = max_new_tokens or self.max_new_tokens
+        generate_kwargs = self._sampling_kwargs()
+        stopping_criteria = []
+        if streamers is not None:
+            generate_kwargs['streamer'] = BatchStreamer(streamers, self.eos_token_id)
+            stopping_criteria.append(StopCancelledRows(streamers))
+        if self.compiled:
+            # Keep max_length, and so the static cache size, fixed; the criterion enforces the token budget
+            stop_length = inputs["input_ids"].shape[1] + max_new_tokens
+            generate_kwargs['max_length'] = self.MAX_PROMPT_TOKENS + self.max_new_tokens
+            stopping_criteria.append(StopAtLength(stop_length))
+        else:
+            generate_kwargs['max_new_tokens'] = max_new_tokens
+        if stopping_criteria:
+            generate_kwargs['stopping_criteria'] = StoppingCriteriaList(stopping_criteria)
+        
+        if self.kv_cache_kwargs is not None:
+            # generate() builds the quantized cache itself, so the prompt is prefilled in one pass
+            generate_kwargs.update(self.kv_cache_kwargs)
+        elif self.compiled:
+            # A static cache keeps every decode step the same shape, so the compiled
+            # forward captures one CUDA graph and replays it for each token
+            generate_kwargs['cache_implementation'] = 'static'
+        else:
+            past_key_values = self._prefill_in_chunks(inputs["input_ids"], inputs["attention_mask"])
+            if past_key_values is not None:
+                # generate() only runs the tokens the cache does not cover yet
+                generate_kwargs['past_key_values'] = past_key_values
+        
+        return self.model.generate(
+            inputs["input_ids"],
+            attention_mask=inputs["attention_mask"],
+            num_return_sequences=1,
+            eos_token_id=self.eos_token_id,
+            pad_token_id=self.pad_token_id,
+            **generate_kwargs
+        )
+    
+    def _sampling_kwargs(self):
+        """generate() arguments for the configured decoding mode"""
+        if not self.do_sample:
+            return {'do_sample': False}
+        return {'do_sample': True, 'top_p': self.top_p, 'temperature': self.temperature}
+    
+    def _get_kv_cache_kwargs(self):
+        """Build generate() arguments for a quantized KV cache if one is requested and supported
+        
+        Decoding re-reads the whole KV cache for every token, so storing it in
+        8 or 4 bits cuts that memory traffic and leaves room for longer contexts
+        and larger batches. Quantization is done by the HQQ backend of transformers.
+        """
+        kv_quantization = (self.generation_config.get('kv_cache_quantization') or 'none').lower()
+        if kv_quantization == 'none':
+            return None
+        
+        nbits = {'int8': 8, 'int4': 4}.get(kv_quantization)
+        if nbits is None:
+            logger.warning(f"Unsupported KV cache quantization '{kv_quantization}', using an unquantized cache")
+            return None
+        if self.main_device.type != 'cuda':
+            logger.warning("KV cache quantization requires a CUDA device, using an unquantized cache")
+            return None
+        if importlib.util.find_spec('hqq') is None:
+            logger.warning("hqq is not installed, using an unquantized KV cache")
+            return None
+        
+        logger.info(f"Using a {nbits}-bit quantized KV cache")
+        return {
+            'cache_implementation': 'quantized',
+            'cache_config': {'backend': 'HQQ', 'nbits': nbits, 'device': str(self.main_device)}
+        }
+    
+    def _prefill_in_chunks(self, input_ids, attention_mask):
+        """Build the KV cache for a long prompt in fixed-size slices
+
+        Returns None when the prompt fits in one chunk or chunking is disabled.
+        The last prompt token is left for generate() so it produces the first
+        logits itself.
+        """
+        chunk_size = self.prefill_chunk_size
+        prompt_length = input_ids.size(1)
+        if not chunk_size or prompt_length <= chunk_size:
+            return None
+        
+        try:
+            cache = DynamicCache()
+            # Positions follow the attention mask so left padding is accounted for
+            position_ids = (attention_mask.long().cumsum(-1) - 1).clamp(min=0)
+            # The backbone fills the cache without computing vocabulary logits for every token
+            backbone = getattr(self.model, 'base_model', self.model)
+            
+            for start in range(0, prompt_length - 1, chunk_size):
+                end = min(start + chunk_size, prompt_length - 1)
+                backbone(
+                    input_ids=input_ids[:, start:end],
+                    attention_mask=attention_mask[:, :end],
+                    position_ids=position_ids[:, start:end],
+                    past_key_values=cache,
+                    use_cache=True
+                )
+            
+            logger.debug(f"Prefilled {prompt_length - 1} prompt tokens in chunks of {chunk_size}")
+            return cache
+        
+        except Exception as e:
+            logger.warning(f"Chunked prefill failed, falling back to a single prefill: {str(e)}")
+            return None
+            
+    def _pipeline_generate(self, input_ids, pipeline_stages):
+        """Custom generation logic for pipeline parallelism
+        
+        The pipeline stages are the transformer's own submodules placed across two
+        devices, so the transformer forward runs them in order with hooks moving
+        activations across the split. After the prompt is prefilled, each step
+        feeds only the newest token and reuses the KV cache of both stages.
+        """
+        try:
+            transformer = self.model.transformer
+            lm_head_device = self.model.lm_head.weight.device
+            eos_token_id = self.eos_token_id
+            
+            # Same sampling as the standard generate() path
+            logits_warpers = LogitsProcessorList([
+                TemperatureLogitsWarper(self.temperature),
+                TopPLogitsWarper(self.top_p)
+            ])
+            
+            # Write tokens into a buffer allocated once instead of growing the sequence each step
+            batch_size, length = input_ids.shape
+            max_length = length + self.max_new_tokens
+            output_ids = torch.full((batch_size, max_length), eos_token_id, dtype=input_ids.dtype, device=input_ids.device)
+            output_ids[:, :length] = input_ids
+            step_ids = input_ids
+            past_key_values = None
+            # Position ids for every step are views into one buffer instead of a new arange per call
+            position_buf = torch.arange(max_length, dtype=torch.long, device=input_ids.device).unsqueeze(0)
+            cached_length = 0
+            finished = torch.zeros(batch_size, dtype=torch.bool, device=input_ids.device)
+            
+            while length < max_length:
+                # Only the tokens not yet in the cache are run
+                outputs = transformer(
+                    input_ids=step_ids,
+                    position_ids=position_buf[:, cached_length:length],
+                    past_key_values=past_key_values,
+                    use_cache=True
+                )
+                past_key_values = outputs.past_key_values
+                cached_length = length
                 
-                # Final output processing
-                hidden_states = pipeline_stages['output_head'](hidden_states)
+                # Sample the next token on the device
+                hidden_states = outputs.last_hidden_state[:, -1, :].to(lm_head_device)
+                next_token_logits = self.model.lm_head(hidden_states).to(input_ids.device)
+                if self.do_sample:
+                    next_token_scores = logits_warpers(output_ids[:, :length], next_token_logits)
+                    probs = torch.softmax(next_token_scores.float(), dim=-1)
+                    next_token = torch.multinomial(probs, num_samples=1).squeeze(-1)
+                else:
+                    next_token = next_token_logits.argmax(dim=-1)
                 
-                # Get the next token prediction
-                next_token_logits = self.model.lm_head(hidden_states[:, -1, :])
-                next_token = next_token_logits.argmax(dim=-1).unsqueeze(-1)
+                # Sequences that already hit EOS keep emitting EOS, which decoding skips
+                next_token = torch.where(finished, torch.full_like(next_token, eos_token_id), next_token)
+                finished |= next_token == eos_token_id
                 
-                # Append to the sequence
-                current_ids = torch.cat([current_ids, next_token], dim=-1)
+                output_ids[:, length] = next_token
+                step_ids = output_ids[:, length:length + 1]
+                length += 1
                 
-                # Stop if end of sequence token is generated
-                if next_token.item() == self.tokenizer.eos_token_id:
+                # Stop once every sequence has generated the end of sequence token
+                if length % self.EOS_CHECK_INTERVAL == 0 and finished.all():
                     break
                     
-            return current_ids
+            return output_ids[:, :length]
             
         except Exception as e:
             logger.error(f"Pipeline generation failed: {str(e)}")
@@ -107,9 +624,9 @@ class InferenceEngine:
             self.model.to(self.main_device)
             return self.model.generate(
                 input_ids,
-                max_length=1024,
-                do_sample=True,
-                top_p=0.9,
-                temperature=0.6,
-                num_return_sequences=1
+                max_new_tokens=self.max_new_tokens,
+                num_return_sequences=1,
+                eos_token_id=self.eos_token_id,
+                pad_token_id=self.pad_token_id,
+                **self._sampling_kwargs()
             )
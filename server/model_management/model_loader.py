@@ -3,16 +3,27 @@ Handles loading models and tokenizers from various sources
 """
 import os
 import logging
+import importlib.util
 import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers import AutoConfig, AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig
 
 logger = logging.getLogger(__name__)
 
+# Precision names accepted in the device configuration
+DTYPES = {
+    'float16': torch.float16,
+    'bfloat16': torch.bfloat16,
+    'float32': torch.float32
+}
+
 class ModelLoader:
     """Responsible for loading models and tokenizers from various sources"""
     
     def __init__(self, device_config):
         self.device_config = device_config
+        self.quantized = False
+        self.placed_on_main_device = False
+        self.ipex_optimized = False
         # Disable HF warning about symlinks
         os.environ['HF_HUB_DISABLE_SYMLINKS_WARNING'] = '1'
         
@@ -22,20 +33,45 @@ class ModelLoader:
             logger.info(f"Loading model from {model_path}")
             
             # Load tokenizer
-            tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True)
+            tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True, use_fast=True)
+            if not tokenizer.is_fast:
+                logger.warning("No fast tokenizer available for this model; tokenization will be slower")
             logger.info("Tokenizer loaded successfully")
             
-            # Configure precision based on hardware
-            model_dtype = torch.float16 if self.device_config['main_device'] == 'cuda' else torch.float32
+            # Configure precision based on hardware and configuration
+            model_dtype = self._resolve_dtype()
             logger.info(f"Using model precision: {model_dtype}")
             
+            load_kwargs = {
+                'trust_remote_code': True,
+                'low_cpu_mem_usage': True,
+                'torch_dtype': model_dtype
+            }
+            
+            # 8-bit or 4-bit weights cut memory traffic again relative to fp16
+            quantization_config = self._get_quantization_config(model_path, model_dtype)
+            if quantization_config is not None:
+                load_kwargs['quantization_config'] = quantization_config
+                # Quantized weights cannot be moved after loading, so place them up front
+                load_kwargs['device_map'] = {'': self.device_config['main_device']}
+            elif self._fits_on_main_gpu(model_path, model_dtype):
+                # Stream each shard straight to the GPU instead of staging the whole model in RAM
+                load_kwargs['device_map'] = {'': self.device_config['main_device']}
+            
             # Load model with optimized settings
-            model = AutoModelForCausalLM.from_pretrained(
-                model_path, 
-                trust_remote_code=True,
-                low_cpu_mem_usage=True,
-                torch_dtype=model_dtype
-            )
+            if self.device_config['main_device'] == 'cuda':
+                # Let any fp32 matmuls left in the model (norms, upcast logits) use TF32 tensor cores
+                torch.backends.cuda.matmul.allow_tf32 = True
+                torch.backends.cudnn.allow_tf32 = True
+            
+            model = AutoModelForCausalLM.from_pretrained(model_path, **load_kwargs)
+            # Dropout and other training-only behaviour stay off for serving
+            model.eval()
+            self.quantized = quantization_config is not None
+            self.placed_on_main_device = 'device_map' in load_kwargs
+            
+            if self.device_config['main_device'] == 'cpu':
+                model = self._optimize_for_cpu(model, model_dtype)
             logger.info("Model loaded successfully")
             
             return model, tokenizer
@@ -44,10 +80,167 @@ class ModelLoader:
             logger.error(f"Error loading model: {str(e)}")
             raise
             
+    def _fits_on_main_gpu(self, model_path, model_dtype):
+        """Check whether the unquantized weights fit in free GPU memory, so they can be placed at load time
+        
+        This is the placement the accelerate device map strategy would choose for
+        such a model anyway; models that do not fit are left to the strategies.
+        """
+        if self.device_config['main_device'] != 'cuda' or importlib.util.find_spec('accelerate') is None:
+            return False
+        
+        try:
+            param_count = self._count_parameters(model_path)
+            # Leave headroom for the KV cache and activations
+            free_bytes = torch.cuda.mem_get_info()[0] * 0.85
+        except Exception as e:
+            logger.warning(f"Could not size the model for direct GPU placement: {str(e)}")
+            return False
+        
+        return param_count * (torch.finfo(model_dtype).bits // 8) <= free_bytes
+    
+    @staticmethod
+    def _count_parameters(model_path):
+        """Count a model's parameters on the meta device, without allocating any weights"""
+        from accelerate import init_empty_weights
+        
+        config = AutoConfig.from_pretrained(model_path, trust_remote_code=True)
+        with init_empty_weights():
+            empty_model = AutoModelForCausalLM.from_config(config, trust_remote_code=True)
+        return empty_model.num_parameters()
+    
+    def _resolve_dtype(self):
+        """Pick the weight precision from the configured dtype, defaulting by device"""
+        dtype_name = (self.device_config.get('dtype') or 'auto').lower()
+        if dtype_name in DTYPES:
+            return DTYPES[dtype_name]
+        if dtype_name != 'auto':
+            logger.warning(f"Unknown model dtype '{dtype_name}', choosing automatically")
+        
+        if self.device_config['main_device'] == 'cuda':
+            # Ampere (sm80) and newer run bf16 at fp16 speed without fp16's overflow risk
+            if torch.cuda.is_available() and torch.cuda.get_device_capability()[0] >= 8:
+                return torch.bfloat16
+            return torch.float16
+        if self.device_config['main_device'] == 'mps':
+            return torch.float16
+        # Native bf16 matmuls make half-size weights a straight win on the CPU
+        if self.device_config['main_device'] == 'cpu' and self._cpu_supports_bf16():
+            return torch.bfloat16
+        return torch.float32
+    
+    @staticmethod
+    def _cpu_supports_bf16():
+        """Check whether the CPU has native bfloat16 matmul support (AVX512-BF16 or AMX)"""
+        for check_name in ('_is_avx512_bf16_supported', '_is_amx_tile_supported'):
+            check = getattr(torch.cpu, check_name, None)
+            if check is not None and check():
+                return True
+        
+        # Older PyTorch builds lack the helpers; read the CPU flags directly on Linux
+        try:
+            with open('/proc/cpuinfo') as cpuinfo:
+                flags = cpuinfo.read()
+            return 'avx512_bf16' in flags or 'amx_bf16' in flags
+        except OSError:
+            return False
+    
+    def _get_quantization_config(self, model_path, model_dtype):
+        """Build a bitsandbytes quantization config if one is requested and supported"""
+        quantization = (self.device_config.get('quantization') or 'none').lower()
+        if quantization == 'auto':
+            quantization = self._choose_quantization_to_fit(model_path, model_dtype)
+        if quantization == 'none':
+            return None
+        
+        if quantization not in ('8bit', 'nf4'):
+            logger.warning(f"Unsupported quantization '{quantization}', loading unquantized weights")
+            return None
+        if self.device_config['main_device'] == 'cpu' and importlib.util.find_spec('intel_extension_for_pytorch'):
+            # Quantized on the CPU after loading, by _optimize_for_cpu
+            return None
+        if self.device_config['main_device'] != 'cuda':
+            logger.warning(f"{quantization} quantization requires a CUDA device or Intel Extension for PyTorch on the CPU, loading unquantized weights")
+            return None
+        if importlib.util.find_spec('bitsandbytes') is None:
+            logger.warning("bitsandbytes is not installed, loading unquantized weights")
+            return None
+        
+        logger.info(f"Loading model with {quantization} quantization")
+        if quantization == 'nf4':
+            # 4-bit NormalFloat weights with matmuls in the model's precision (bf16 on Ampere+);
+            # double quantization also shrinks the scales
+            return BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_quant_type='nf4',
+                bnb_4bit_compute_dtype=model_dtype,
+                bnb_4bit_use_double_quant=True
+            )
+        return BitsAndBytesConfig(load_in_8bit=True)
+    
+    def _optimize_for_cpu(self, model, model_dtype):
+        """Quantize the weights with Intel Extension for PyTorch when running on the CPU
+        
+        Only applies when MODEL_QUANTIZATION is 8bit or nf4: weights are quantized
+        to int8 or int4 (weight-only) so each decode step reads a quarter or an
+        eighth of the fp32 bytes, and matmuls use the VNNI/AMX int8 instructions.
+        Returns the model unchanged otherwise, or if IPEX is missing or rejects
+        the model.
+        """
+        quantization = (self.device_config.get('quantization') or 'none').lower()
+        weight_dtype_name = {'8bit': 'INT8', 'nf4': 'INT4'}.get(quantization)
+        if weight_dtype_name is None or importlib.util.find_spec('intel_extension_for_pytorch') is None:
+            return model
+        
+        try:
+            import intel_extension_for_pytorch as ipex
+            
+            qconfig = ipex.quantization.get_weight_only_quant_qconfig_mapping(
+                weight_dtype=getattr(ipex.quantization.WoqWeightDtype, weight_dtype_name),
+                lowp_mode=ipex.quantization.WoqLowpMode.INT8
+            )
+            model = ipex.llm.optimize(model, dtype=model_dtype, quantization_config=qconfig, inplace=True)
+            self.quantized = True
+            self.ipex_optimized = True
+            logger.info(f"Applied Intel Extension for PyTorch optimizations with {weight_dtype_name.lower()} weights")
+        except Exception as e:
+            logger.warning(f"Intel Extension for PyTorch could not optimize the model, running it as loaded: {str(e)}")
+        
+        return model
+    
+    def _choose_quantization_to_fit(self, model_path, model_dtype):
+        """Pick the least aggressive quantization that lets the weights fit in free GPU memory
+        
+        Returns 'none' when the model fits unquantized or cannot be quantized here,
+        leaving oversized models to the distribution strategies.
+        """
+        if self.device_config['main_device'] != 'cuda' or importlib.util.find_spec('bitsandbytes') is None:
+            return 'none'
+        
+        try:
+            param_count = self._count_parameters(model_path)
+            
+            # Leave headroom for the KV cache and activations
+            free_bytes = torch.cuda.mem_get_info()[0] * 0.85
+        except Exception as e:
+            logger.warning(f"Could not size the model for automatic quantization: {str(e)}")
+            return 'none'
+        
+        bytes_per_param = torch.finfo(model_dtype).bits // 8
+        for quantization, quantized_bytes in (('none', bytes_per_param), ('8bit', 1), ('nf4', 0.5)):
+            if param_count * quantized_bytes <= free_bytes:
+                logger.info(f"Automatic quantization chose '{quantization}' for {param_count / 1e9:.1f}B parameters")
+                return quantization
+        
+        logger.info("Model does not fit on the GPU even in 4-bit; loading unquantized for distribution")
+        return 'none'
+    
     def estimate_model_size_gb(self, model):
-        """Estimate model size in GB based on parameter count"""
-        param_count = sum(p.numel() for p in model.parameters())
-        # Each parameter is typically stored as float32 (4 bytes) or float16 (2 bytes)
-        bytes_per_param = 2 if self.device_config['main_device'] == 'cuda' else 4
-        model_size_gb = (param_count * bytes_per_param) / (1024**3)
+        """Estimate model size in GB from the bytes its weights actually occupy"""
+        # HF models report their footprint using each tensor's real dtype (fp16, bf16, int8, 4-bit)
+        if hasattr(model, 'get_memory_footprint'):
+            model_bytes = model.get_memory_footprint()
+        else:
+            model_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+        model_size_gb = model_bytes / (1024**3)
         return model_size_gb
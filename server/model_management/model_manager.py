@@ -2,45 +2,99 @@
 Main model manager that coordinates model loading and inference
 """
 import gc
+import time
 import logging
+import threading
+import importlib.util
+from collections import OrderedDict
+from concurrent.futures import Future
 import torch
 
 from .model_loader import ModelLoader
 from .inference import InferenceEngine
-from .distribution_strategies import get_strategy
+from .batching import BatchScheduler
+from .vllm_engine import VLLMEngine, HAS_VLLM
+from .distribution_strategies import get_strategy, HAS_ACCELERATE
 
 logger = logging.getLogger(__name__)
 
 class ModelManager:
     """Manages loading and inference with ClinicalGPT models"""
     
-    def __init__(self, model_path, device_config):
+    # Greedy decoding always gives the same answer for a prompt, so this many recent ones are kept
+    RESPONSE_CACHE_SIZE = 256
+    
+    def __init__(self, model_path, device_config, generation_config=None):
         self.model_path = model_path
         self.device_config = device_config
+        self.generation_config = generation_config or {}
         self.model = None
         self.tokenizer = None
         self.pipeline_stages = None
         self.is_sharded = False
+        self.compiled = False
         self.loader = ModelLoader(device_config)
         self.inference_engine = None
+        self.batch_scheduler = None
+        self.backend = 'transformers'
+        # Responses by prompt, least recently used first; only filled when sampling is off
+        self._response_cache = OrderedDict() if not self.generation_config.get('do_sample', True) else None
+        self._response_cache_lock = threading.Lock()
     
     def load_model(self):
         """Load model and tokenizer"""
         try:
-            # Load model and tokenizer
-            self.model, self.tokenizer = self.loader.load_model_and_tokenizer(self.model_path)
+            if self.generation_config.get('use_vllm'):
+                self._load_vllm_engine()
             
-            # If main and secondary devices are different, set up hybrid execution
-            if self.device_config['main_device'] != self.device_config['secondary_device']:
-                strategy_applied = self._apply_distribution_strategy()
-            else:
-                # Standard single-device execution
-                main_device = torch.device(self.device_config['main_device'])
-                self.model.to(main_device)
-                logger.info(f"Model moved to {self.device_config['main_device']} device successfully")
+            if self.inference_engine is None:
+                # Load model and tokenizer
+                self.model, self.tokenizer = self.loader.load_model_and_tokenizer(self.model_path)
+                
+                # If main and secondary devices are different, set up hybrid execution
+                if self.loader.quantized:
+                    # Quantized weights were placed on the main device at load time
+                    logger.info(f"Quantized model loaded on {self.device_config['main_device']}; skipping distribution")
+                elif self.loader.placed_on_main_device:
+                    # The whole model fit on the GPU and was placed there at load time
+                    logger.info(f"Model loaded directly onto {self.device_config['main_device']}; skipping distribution")
+                elif self.device_config['main_device'] != self.device_config['secondary_device']:
+                    strategy_applied = self._apply_distribution_strategy()
+                else:
+                    # Standard single-device execution
+                    main_device = torch.device(self.device_config['main_device'])
+                    self.model.to(main_device)
+                    logger.info(f"Model moved to {self.device_config['main_device']} device successfully")
+                
+                compile_setting = self.generation_config.get('compile_model', 'false')
+                if compile_setting == 'true' or (compile_setting == 'auto' and self._can_auto_compile()):
+                    self._compile_model()
+                
+                # Initialize the inference engine
+                self.inference_engine = InferenceEngine(
+                    self.model, self.tokenizer, self.device_config, self.generation_config,
+                    compiled=self.compiled
+                )
+                if self.loader.ipex_optimized:
+                    # IPEX models keep their own KV cache layout, which a chunked DynamicCache prefill cannot feed
+                    self.inference_engine.prefill_chunk_size = 0
+                
+                if self.compiled:
+                    self._warmup_compiled_model()
             
-            # Initialize the inference engine
-            self.inference_engine = InferenceEngine(self.model, self.tokenizer, self.device_config)
+            # Coalesce concurrent requests into batched generate calls
+            max_batch_size = self.generation_config.get('max_batch_size', 1)
+            if self.backend == 'vllm':
+                # vLLM's LLM object is not thread-safe, so a single worker always owns it;
+                # each call hands vLLM's continuous-batching scheduler a full batch of prompts
+                max_batch_size = max(self.generation_config.get('vllm', {}).get('max_num_seqs', 64), 1)
+            if max_batch_size > 1 or self.backend == 'vllm':
+                self.batch_scheduler = BatchScheduler(
+                    self.inference_engine,
+                    pipeline_stages=self.pipeline_stages,
+                    max_batch_size=max_batch_size,
+                    max_wait_ms=self.generation_config.get('batch_wait_ms', 5)
+                )
             
             # Run garbage collection to free memory
             self._cleanup_memory()
@@ -51,6 +105,73 @@ class ModelManager:
             logger.error(f"Error loading model: {str(e)}")
             return False
     
+    def _can_auto_compile(self):
+        """Check whether compiling is likely to help without explicit opt-in"""
+        if self.device_config['main_device'] != 'cuda' or self.is_sharded or self.pipeline_stages is not None:
+            return False
+        # bitsandbytes kernels do not compile cleanly
+        if self.loader.quantized:
+            return False
+        # reduce-overhead mode needs PyTorch 2.1+ and Triton for its generated kernels
+        torch_version = tuple(int(part) for part in torch.__version__.split('+')[0].split('.')[:2])
+        return torch_version >= (2, 1) and importlib.util.find_spec('triton') is not None
+    
+    def _compile_model(self):
+        """Compile the model forward pass so decode steps replay captured CUDA graphs"""
+        if self.device_config['main_device'] != 'cuda' or self.is_sharded or self.pipeline_stages is not None:
+            logger.warning("torch.compile is only applied to models on a single CUDA device; skipping")
+            return
+        
+        try:
+            torch.set_float32_matmul_precision('high')
+            self._eager_forward = self.model.forward
+            # Compile forward rather than the module so generate() keeps working unchanged
+            # Inputs are padded to a fixed set of shapes, each specialized and warmed up at startup
+            self.model.forward = torch.compile(self.model.forward, mode="reduce-overhead", fullgraph=False, dynamic=False)
+            self.compiled = True
+            logger.info("Model forward compiled with torch.compile (reduce-overhead)")
+        except Exception as e:
+            logger.error(f"torch.compile failed, running the model eagerly: {str(e)}")
+    
+    def _warmup_compiled_model(self):
+        """Trigger compilation and CUDA graph capture at startup instead of on the first request"""
+        start = time.perf_counter()
+        try:
+            self.inference_engine.warmup()
+            logger.info(f"Compiled model warmed up in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            # Some graphs fail to compile or capture; the eager model is always safe
+            logger.error(f"Compiled model failed during warmup, reverting to eager execution: {str(e)}")
+            self.model.forward = self._eager_forward
+            self.compiled = False
+            self.inference_engine.compiled = False
+    
+    def _load_vllm_engine(self):
+        """Try to serve generation from vLLM, leaving the transformers path as fallback"""
+        if not HAS_VLLM:
+            logger.warning("USE_VLLM is set but vLLM is not installed; using transformers backend")
+            return
+        if self.device_config['main_device'] != 'cuda':
+            logger.warning("vLLM requires a CUDA device; using transformers backend")
+            return
+        
+        try:
+            vllm_config = {
+                'max_tokens': self.generation_config.get('max_new_tokens', 512),
+                'do_sample': self.generation_config.get('do_sample', True),
+                # An explicit MODEL_DTYPE applies to vLLM too; 'auto' keeps the checkpoint's dtype
+                'dtype': (self.device_config.get('dtype') or 'auto').lower(),
+                **self.generation_config.get('vllm', {})
+            }
+            self.inference_engine = VLLMEngine(self.model_path, vllm_config)
+            # vLLM owns sharding and memory placement, so no distribution strategy is applied
+            self.model = self.inference_engine.llm
+            self.tokenizer = self.inference_engine.tokenizer
+            self.backend = 'vllm'
+        except Exception as e:
+            logger.error(f"Failed to load vLLM engine, using transformers backend: {str(e)}")
+            self.inference_engine = None
+    
     def _apply_distribution_strategy(self):
         """Choose and apply an appropriate distribution strategy based on model and hardware"""
         # Estimate model size to help determine strategy
@@ -58,7 +179,10 @@ class ModelManager:
         logger.info(f"Estimated model size: {model_size_gb:.2f} GB")
         
         # Select distribution strategy based on model size and available hardware
-        if self.device_config['main_device'] == 'cuda' and model_size_gb > 8:
+        if self.device_config['main_device'] == 'cuda' and self.device_config['secondary_device'] == 'cpu' and HAS_ACCELERATE:
+            # Let accelerate fill the GPU with whole blocks and offload the remainder to the CPU
+            strategy = get_strategy('auto_device_map', self.model, self.device_config)
+        elif self.device_config['main_device'] == 'cuda' and model_size_gb > 8:
             # For very large models, use model parallelism
             strategy = get_strategy('model_parallelism', self.model, self.device_config)
         elif self.device_config['main_device'] == 'cuda' and self.device_config['secondary_device'] == 'cpu':
@@ -79,7 +203,10 @@ class ModelManager:
     
     def _cleanup_memory(self):
         """Clean up memory after model loading"""
-        gc.collect()
+        # A full collection walks every object the model created; loading leaves no
+        # cycles worth that, so only collect when explicitly requested
+        if self.device_config.get('aggressive_gc'):
+            gc.collect()
         if self.device_config['main_device'] == 'cuda':
             torch.cuda.empty_cache()
     
@@ -88,4 +215,71 @@ class ModelManager:
         if not self.inference_engine:
             raise ValueError("Model not loaded or inference engine not initialized")
         
-        return self.inference_engine.generate_response(prompt, self.pipeline_stages)
+        cached = self._get_cached_response(prompt)
+        if cached is not None:
+            return cached
+        
+        if self.batch_scheduler is not None:
+            response = self.batch_scheduler.generate(prompt)
+        else:
+            response = self.inference_engine.generate_response(prompt, self.pipeline_stages)
+        
+        self._cache_response(prompt, response)
+        return response
+    
+    def generate_response_stream(self, prompt):
+        """Generate a response, yielding the text in chunks as tokens are produced"""
+        if not self.inference_engine:
+            raise ValueError("Model not loaded or inference engine not initialized")
+        
+        cached = self._get_cached_response(prompt)
+        if self.backend == 'vllm' or cached is not None:
+            # Cached answers, and the vLLM engine's finished responses, arrive in one piece
+            yield cached if cached is not None else self.generate_response(prompt)
+            return
+        
+        streamer = self.inference_engine.create_streamer()
+        if self.batch_scheduler is not None:
+            future = self.batch_scheduler.submit(prompt, streamer=streamer)
+        else:
+            future = Future()
+            threading.Thread(
+                target=self._generate_into_future, args=(prompt, streamer, future),
+                name="stream-generate", daemon=True
+            ).start()
+        
+        try:
+            yield from streamer
+        except GeneratorExit:
+            # The client went away mid-response; stop generating its row
+            streamer.cancelled = True
+            raise
+        # Re-raise a generation error once the streamer has been closed
+        self._cache_response(prompt, future.result())
+    
+    def _get_cached_response(self, prompt):
+        """Return the cached greedy response for a prompt, or None"""
+        if self._response_cache is None:
+            return None
+        with self._response_cache_lock:
+            response = self._response_cache.get(prompt)
+            if response is not None:
+                self._response_cache.move_to_end(prompt)
+            return response
+    
+    def _cache_response(self, prompt, response):
+        """Remember a greedy response, evicting the least recently used one when full"""
+        if self._response_cache is None:
+            return
+        with self._response_cache_lock:
+            self._response_cache[prompt] = response
+            self._response_cache.move_to_end(prompt)
+            if len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+    
+    def _generate_into_future(self, prompt, streamer, future):
+        """Thread target for streamed generation without a batch scheduler"""
+        try:
+            future.set_result(self.inference_engine.generate_response(prompt, self.pipeline_stages, streamer=streamer))
+        except Exception as e:
+            future.set_exception(e)
@@ -0,0 +1,59 @@
+"""
+Optional vLLM inference backend
+Provides the same generation interface as InferenceEngine on top of vLLM,
+whose paged KV cache lets many sequences share GPU memory efficiently
+"""
+import logging
+
+# Try to import vLLM (optional, CUDA only)
+try:
+    from vllm import LLM, SamplingParams
+    HAS_VLLM = True
+except ImportError:
+    HAS_VLLM = False
+
+logger = logging.getLogger(__name__)
+
+class VLLMEngine:
+    """Generates responses with a vLLM engine instead of HuggingFace generate()"""
+
+    def __init__(self, model_path, vllm_config=None):
+        if not HAS_VLLM:
+            raise ImportError("vLLM is not installed")
+
+        vllm_config = vllm_config or {}
+        logger.info(f"Loading {model_path} with vLLM")
+        self.llm = LLM(
+            model=model_path,
+            trust_remote_code=True,
+            dtype=vllm_config.get('dtype', 'auto'),
+            tensor_parallel_size=vllm_config.get('tensor_parallel_size', 1),
+            gpu_memory_utilization=vllm_config.get('gpu_memory_utilization', 0.9),
+            max_model_len=vllm_config.get('max_model_len', 2048),
+            max_num_seqs=vllm_config.get('max_num_seqs', 64)
+        )
+        self.tokenizer = self.llm.get_tokenizer()
+        # Same sampling settings as the transformers backend; temperature 0 is greedy
+        self.sampling_params = SamplingParams(
+            temperature=0.6 if vllm_config.get('do_sample', True) else 0.0,
+            top_p=0.9,
+            max_tokens=vllm_config.get('max_tokens', 512)
+        )
+        logger.info("vLLM engine loaded successfully")
+
+    def generate_response(self, prompt, pipeline_stages=None):
+        """Generate a response for a single prompt"""
+        return self.generate_batch([prompt])[0]
+
+    def generate_batch(self, prompts):
+        """Generate responses for several prompts in one scheduler pass"""
+        try:
+            outputs = self.llm.generate(prompts, self.sampling_params, use_tqdm=False)
+            # vLLM returns only the completion, without the prompt text
+            responses = [output.outputs[0].text.strip() for output in outputs]
+            logger.info(f"Generated {len(responses)} responses with vLLM")
+            return responses
+
+        except Exception as e:
+            logger.error(f"Error generating responses with vLLM: {str(e)}")
+            raise
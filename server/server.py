@@ -1,50 +1,79 @@
 """
 ClinicalGPT Medical Assistant - Main server module
-This is the entry point for the Flask server application.
+Builds the Flask application. Importing this module does no work; call
+create_app() (as server.wsgi does) to configure the app and load the model,
+or run it directly to start the debug server.
 """
 import os
 import sys
-import time
 import traceback
 import logging
+
+# Add project root to Python path when run as a script
+if __name__ == '__main__':
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    sys.path.insert(0, project_root)
+
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 
-# Add project root to Python path
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-sys.path.insert(0, project_root)
 logger = logging.getLogger(__name__)
 
 # Disable Intel Extension auto-loading to prevent errors
 os.environ["TORCH_DEVICE_BACKEND_AUTOLOAD"] = "0"
 
-try:
+# The CUDA allocator reads its settings once, before the first allocation. Expandable
+# segments let the cache grow in place instead of issuing fresh cudaMalloc calls for
+# differently sized requests. Not supported on Windows; an explicit setting wins.
+if sys.platform != 'win32':
+    os.environ.setdefault(
+        "PYTORCH_CUDA_ALLOC_CONF",
+        "expandable_segments:True,garbage_collection_threshold:0.9"
+    )
+
+def create_app(config=None):
+    """Create the Flask app, load the model once and register all routes
+
+    config defaults to load_config(). The loaded configuration is kept in
+    app.config['CLINICALGPT'] for callers that need the port or other settings.
+    """
     logger.info("Starting ClinicalGPT Medical Assistant server...")
-    
+
     # Import server modules
     from server.config import load_config
     from server.utils.device_detection import detect_devices
-    from server.model_management import ModelManager  # Updated import path
+    from server.model_management import ModelManager
     from server.api import register_routes
-    
+    from server.utils.request_compression import GzipRequestMiddleware
+    from server.utils.json_provider import init_json_provider
+
     # Load configuration
-    config = load_config()
-    
-    # Detect available devices
-    device_config = detect_devices()
-    
+    if config is None:
+        config = load_config()
+
+    # Detect available devices; detected placement overrides the configured defaults
+    device_config = {**config['device_config'], **detect_devices()}
+
     # Set up static folder path
     static_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
     logger.info(f"Static folder path: {static_folder}")
-    
+
     # Initialize Flask app
     app = Flask(__name__, static_folder=static_folder)
     CORS(app)  # Enable CORS for all routes
-    
-    # Initialize model manager
-    model_manager = ModelManager(config['model_path'], device_config)
+    init_json_provider(app)
+    app.config['CLINICALGPT'] = config
+
+    # Let Werkzeug refuse oversized uploads before the body is read
+    app.config['MAX_CONTENT_LENGTH'] = config['max_upload_mb'] * 1024 * 1024
+
+    # Accept gzip-compressed request bodies from the web client
+    app.wsgi_app = GzipRequestMiddleware(app.wsgi_app, max_size=app.config['MAX_CONTENT_LENGTH'])
+
+    # Initialize model manager; the model is loaded before the app is handed to a server
+    model_manager = ModelManager(config['model_path'], device_config, config['generation'])
     model_manager.load_model()
-    
+
     # Register static file routes
     @app.route('/')
     def index():
@@ -60,22 +89,22 @@ try:
     def serve_css(filename):
         """Serve CSS files"""
         return send_from_directory(os.path.join(app.static_folder, 'css'), filename)
-    
+
     # Register API routes
     register_routes(app, model_manager, device_config)
-    
-    # Run the app if executed directly
-    if __name__ == '__main__':
-        try:
-            logger.info(f"Starting server on http://localhost:{config['port']}")
-            app.run(host='0.0.0.0', port=config['port'], debug=config['debug'], use_reloader=False)
-        except KeyboardInterrupt:
-            logger.info("Server stopped by user")
-        except Exception as e:
-            logger.error(f"Error starting server: {str(e)}")
-            traceback.print_exc()
-            
-except Exception as global_exception:
-    print(f"CRITICAL ERROR: {str(global_exception)}")
-    traceback.print_exc()
-    time.sleep(30)  # Keep the window open to see the error
\ No newline at end of file
+
+    return app
+
+# Run the app if executed directly
+if __name__ == '__main__':
+    try:
+        app = create_app()
+        config = app.config['CLINICALGPT']
+        logger.info(f"Starting server on http://localhost:{config['port']}")
+        app.run(host='0.0.0.0', port=config['port'], debug=config['debug'], use_reloader=False)
+    except KeyboardInterrupt:
+        logger.info("Server stopped by user")
+    except Exception as e:
+        logger.error(f"Error starting server: {str(e)}")
+        traceback.print_exc()
+        sys.exit(1)
@@ -2,9 +2,35 @@
 
 // Global variables
 const API_URL = window.location.origin;
+const API_ENDPOINTS = Object.freeze({
+    health: `${API_URL}/api/health`,
+    query: `${API_URL}/api/query`,
+    queryStream: `${API_URL}/api/query/stream`,
+    processFile: `${API_URL}/api/process-file`,
+    detectMedicalTerms: `${API_URL}/api/detect-medical-terms`
+});
 let chatHistory = [];
+const MAX_HISTORY_ITEMS = 20;
 let currentChatId = generateChatId();
 
+// Cache of recent query responses, keyed by search mode and query text.
+// A Map keeps insertion order, so the first key is always the least recently used.
+const QUERY_CACHE_MAX_ENTRIES = 128;
+const QUERY_CACHE_TTL_MS = 10 * 60 * 1000;
+const queryCache = new Map();
+
+// Cache of file analyses keyed by the SHA-256 of the file contents
+const FILE_CACHE_MAX_ENTRIES = 32;
+const fileResultCache = new Map();
+
+// Request bodies larger than this are sent gzip-compressed
+const GZIP_REQUEST_THRESHOLD_BYTES = 1024;
+
+// Health probe memo: the last probe is reused while it is fresh
+const HEALTH_CHECK_TTL_MS = 5000;
+let healthCheckPromise = null;
+let healthCheckTimestamp = 0;
+
 // Include Marked.js library for Markdown parsing
 const markedScript = document.createElement('script');
 markedScript.src = 'https://cdn.jsdelivr.net/npm/marked/marked.min.js';
@@ -49,6 +75,75 @@ const medicalTerms = [
     'treatment', 'therapy', 'surgery', 'chronic', 'acute'
 ];
 
+// Locale formatters are costly to construct, so build them once and reuse them
+const TIME_FORMATTER = new Intl.DateTimeFormat([], { hour: '2-digit', minute: '2-digit' });
+const DATE_FORMATTER = new Intl.DateTimeFormat();
+
+// Parse static markup once into a <template>; callers clone its content
+function createTemplate(html) {
+    const template = document.createElement('template');
+    template.innerHTML = html.trim();
+    return template;
+}
+
+// Typing indicator shown while waiting for a response
+const typingIndicatorTemplate = createTemplate(`
+    <div class="message-container ai-message" id="typing-indicator">
+        <div class="message-content">
+            <div class="message-header">
+                <div class="message-icon">
+                    <i class="fas fa-robot"></i>
+                </div>
+                <div class="message-sender">ClinicalGPT</div>
+            </div>
+            <div class="message-body">
+                <div class="typing-indicator">
+                    <span></span>
+                    <span></span>
+                    <span></span>
+                </div>
+            </div>
+        </div>
+    </div>
+`);
+
+// Welcome message restored when a chat is cleared
+const welcomeMessageTemplate = createTemplate(`
+    <div class="message-container system-message">
+        <div class="message-content">
+            <div class="message-header">
+                <div class="message-icon">
+                    <i class="fas fa-robot"></i>
+                </div>
+                <div class="message-sender">ClinicalGPT</div>
+            </div>
+            <div class="message-body">
+                <p>Hello! I'm ClinicalGPT, your medical assistant. You can ask me questions about medical conditions, symptoms, treatments, or upload medical files for analysis.</p>
+                
+                <div class="medical-disclaimer alert alert-warning mt-2">
+                    <p><strong>Medical Disclaimer:</strong> The information provided by ClinicalGPT is for informational and educational purposes only. It is not intended as a substitute for professional medical advice, diagnosis, or treatment. Always seek the advice of your physician or other qualified health provider with any questions regarding a medical condition. Never disregard professional medical advice or delay seeking it because of information provided by this system.</p>
+                </div>
+                
+                <div class="sample-queries">
+                    <p class="fw-bold mb-2">Try asking me:</p>
+                    <div class="sample-query" data-query="What are the symptoms of type 2 diabetes?">
+                        <i class="fas fa-comment-medical me-2"></i>What are the symptoms of type 2 diabetes?
+                    </div>
+                    <div class="sample-query" data-query="How is hypertension diagnosed?">
+                        <i class="fas fa-comment-medical me-2"></i>How is hypertension diagnosed?
+                    </div>
+                    <div class="sample-query" data-query="What are the latest treatments for COVID-19?">
+                        <i class="fas fa-comment-medical me-2"></i>What are the latest treatments for COVID-19?
+                    </div>
+                    <div class="sample-query" data-query="Can you explain the differences between Type 1 and Type 2 diabetes?">
+                        <i class="fas fa-comment-medical me-2"></i>Can you explain the differences between Type 1 and Type 2 diabetes?
+                    </div>
+                </div>
+            </div>
+        </div>
+    </div>
+`);
+
 // Initialize the application
 document.addEventListener('DOMContentLoaded', () => {
     checkServerStatus();
@@ -151,6 +246,8 @@ function clearCurrentChat() {
 function clearAllHistory() {
     if (confirm('Are you sure you want to clear all chat history? This cannot be undone.')) {
         chatHistory = [];
+        queryCache.clear();
+        fileResultCache.clear();
         localStorage.removeItem('clinicalGptChatHistory');
         updateHistoryUI();
         updateStatusMessage('All history cleared');
@@ -169,51 +266,63 @@ function showWelcomeMessage() {
     const welcomeMessage = document.querySelector('.system-message');
     if (!welcomeMessage) {
         // If it's not in the DOM for some reason, add it back
-        const welcomeHtml = `
-            <div class="message-container system-message">
-                <div class="message-content">
-                    <div class="message-header">
-                        <div class="message-icon">
-                            <i class="fas fa-robot"></i>
-                        </div>
-                        <div class="message-sender">ClinicalGPT</div>
-                    </div>
-                    <div class="message-body">
-                        <p>Hello! I'm ClinicalGPT, your medical assistant. You can ask me questions about medical conditions, symptoms, treatments, or upload medical files for analysis.</p>
-                        
-                        <div class="medical-disclaimer alert alert-warning mt-2">
-                            <p><strong>Medical Disclaimer:</strong> The information provided by ClinicalGPT is for informational and educational purposes only. It is not intended as a substitute for professional medical advice, diagnosis, or treatment. Always seek the advice of your physician or other qualified health provider with any questions regarding a medical condition. Never disregard professional medical advice or delay seeking it because of information provided by this system.</p>
-                        </div>
-                        
-                        <div class="sample-queries">
-                            <p class="fw-bold mb-2">Try asking me:</p>
-                            <div class="sample-query" data-query="What are the symptoms of type 2 diabetes?">
-                                <i class="fas fa-comment-medical me-2"></i>What are the symptoms of type 2 diabetes?
-                            </div>
-                            <div class="sample-query" data-query="How is hypertension diagnosed?">
-                                <i class="fas fa-comment-medical me-2"></i>How is hypertension diagnosed?
-                            </div>
-                            <div class="sample-query" data-query="What are the latest treatments for COVID-19?">
-                                <i class="fas fa-comment-medical me-2"></i>What are the latest treatments for COVID-19?
-                            </div>
-                            <div class="sample-query" data-query="Can you explain the differences between Type 1 and Type 2 diabetes?">
-                                <i class="fas fa-comment-medical me-2"></i>Can you explain the differences between Type 1 and Type 2 diabetes?
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        `;
-        chatMessagesEl.innerHTML = welcomeHtml;
+        chatMessagesEl.replaceChildren(welcomeMessageTemplate.content.cloneNode(true));
         setupSampleQueries();
     }
 }
 
-// Check server connection status
-function checkServerStatus() {
+// Send a request to one of the API_ENDPOINTS and parse the JSON reply.
+// Non-2xx responses reject with an error naming the status code.
+function apiRequest(url, options = {}) {
+    return fetch(url, options)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Server returned status: ${response.status}`);
+            }
+            return response.json();
+        });
+}
+
+// Build POST options for a JSON body, gzip-compressing bodies above
+// GZIP_REQUEST_THRESHOLD_BYTES where the browser supports CompressionStream
+function buildJsonRequestOptions(data) {
+    const json = JSON.stringify(data);
+    const options = {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: json
+    };
+    
+    if (typeof CompressionStream === 'undefined' || json.length <= GZIP_REQUEST_THRESHOLD_BYTES) {
+        return Promise.resolve(options);
+    }
+    
+    const stream = new Blob([json]).stream().pipeThrough(new CompressionStream('gzip'));
+    return new Response(stream).arrayBuffer()
+        .then(compressed => {
+            options.headers['Content-Encoding'] = 'gzip';
+            options.body = compressed;
+            return options;
+        })
+        .catch(error => {
+            console.error('Could not compress request body:', error);
+            return options;
+        });
+}
+
+// Check server connection status. Results are memoized briefly so bursts of
+// callers share a single /api/health probe; pass force to bypass the memo.
+function checkServerStatus(force = false) {
+    if (!force && healthCheckPromise && Date.now() - healthCheckTimestamp < HEALTH_CHECK_TTL_MS) {
+        return healthCheckPromise;
+    }
+    
     updateStatusMessage('Checking server connection...');
+    healthCheckTimestamp = Date.now();
     
-    fetch(`${API_URL}/api/health`)
+    healthCheckPromise = fetch(API_ENDPOINTS.health)
         .then(response => {
             if (response.ok) {
                 return response.json();
@@ -223,12 +332,38 @@ function checkServerStatus() {
         .then(data => {
             serverStatusEl.innerHTML = '<i class="fas fa-circle text-success me-1"></i> Server Connected';
             updateStatusMessage('Connected to server');
+            return true;
         })
         .catch(error => {
             console.error('Server status check failed:', error);
             serverStatusEl.innerHTML = '<i class="fas fa-circle text-danger me-1"></i> Server Disconnected';
             updateStatusMessage('Error: Could not connect to server', true);
+            return false;
         });
+    
+    return healthCheckPromise;
+}
+
+// Look up a cached query response, refreshing its position on a hit
+function getCachedQueryResponse(key) {
+    const entry = queryCache.get(key);
+    if (!entry) return null;
+    
+    queryCache.delete(key);
+    if (Date.now() - entry.timestamp > QUERY_CACHE_TTL_MS) {
+        return null;
+    }
+    queryCache.set(key, entry);
+    return entry.data;
+}
+
+// Store a query response, evicting the least recently used entry when full
+function cacheQueryResponse(key, data) {
+    queryCache.delete(key);
+    queryCache.set(key, { data: data, timestamp: Date.now() });
+    if (queryCache.size > QUERY_CACHE_MAX_ENTRIES) {
+        queryCache.delete(queryCache.keys().next().value);
+    }
 }
 
 // Send a message to the API
@@ -254,27 +389,38 @@ function handleSendMessage() {
         search_web: webSearchCheckEl.checked
     };
     
+    // Repeated questions are answered from the cache without a server round trip
+    const cacheKey = `${requestData.search_web ? 1 : 0}:${message}`;
+    const cachedData = getCachedQueryResponse(cacheKey);
+    if (cachedData) {
+        removeTypingIndicator();
+        processResponse(cachedData, message);
+        saveChatToHistory();
+        updateStatusMessage('Ready (cached response)');
+        return;
+    }
+    
     updateStatusMessage('Processing query...');
     
-    fetch(`${API_URL}/api/query`, {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json'
-        },
-        body: JSON.stringify(requestData)
-    })
-    .then(response => {
-        if (!response.ok) {
-            throw new Error(`Server returned status: ${response.status}`);
+    buildJsonRequestOptions(requestData)
+    .then(options => {
+        // Older browsers without readable response streams get the whole answer at once
+        if (typeof ReadableStream === 'undefined' || typeof TextDecoder === 'undefined') {
+            return apiRequest(API_ENDPOINTS.query, options).then(data => {
+                processResponse(data, message);
+                return data;
+            });
         }
-        return response.json();
+        return streamQuery(options);
     })
     .then(data => {
         // Remove typing indicator
         removeTypingIndicator();
         
-        // Process and display response
-        processResponse(data, message);
+        // Only successful answers are worth replaying
+        if (!data.error) {
+            cacheQueryResponse(cacheKey, data);
+        }
         
         // Save to chat history
         saveChatToHistory();
@@ -288,31 +434,92 @@ function handleSendMessage() {
         // Show error message
         addErrorMessage(`Error: ${error.message}`);
         updateStatusMessage('Error occurred', true);
+        
+        // fetch() rejects with a TypeError when the server is unreachable
+        if (error instanceof TypeError) {
+            checkServerStatus(true);
+        }
     });
 }
 
+// Request a streamed answer and render it in the chat as tokens arrive.
+// Resolves with the same fields /api/query returns, so the result can be cached.
+function streamQuery(options) {
+    return fetch(API_ENDPOINTS.queryStream, options)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Server returned status: ${response.status}`);
+            }
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            const data = { response: '' };
+            let buffer = '';
+            let contentEl = null;
+            let renderScheduled = false;
+            
+            // Re-render at most once per frame however fast tokens arrive
+            const render = () => {
+                renderScheduled = false;
+                contentEl.innerHTML = typeof marked !== 'undefined' ?
+                    marked.parse(data.response) :
+                    data.response;
+                scrollToBottom();
+            };
+            
+            const handleEvent = block => {
+                let event = 'message';
+                let payload = '';
+                block.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) {
+                        event = line.slice(7);
+                    } else if (line.startsWith('data: ')) {
+                        payload += line.slice(6);
+                    }
+                });
+                const body = payload ? JSON.parse(payload) : {};
+                
+                if (event === 'meta') {
+                    Object.assign(data, body);
+                    removeTypingIndicator();
+                    addMessage('ai', formatAIResponse(data));
+                    contentEl = chatMessagesEl.lastElementChild.querySelector('.markdown-content');
+                } else if (event === 'token' && contentEl) {
+                    data.response += body.text;
+                    if (!renderScheduled) {
+                        renderScheduled = true;
+                        requestAnimationFrame(render);
+                    }
+                } else if (event === 'error') {
+                    throw new Error(body.error);
+                }
+            };
+            
+            const pump = () => reader.read().then(({ done, value }) => {
+                if (done) {
+                    data.response = data.response.trim();
+                    if (contentEl) {
+                        render();
+                    }
+                    updateStatusMessage('Response received');
+                    return data;
+                }
+                
+                buffer += decoder.decode(value, { stream: true });
+                // Events are separated by a blank line; keep any partial event for the next chunk
+                const blocks = buffer.split('\n\n');
+                buffer = blocks.pop();
+                blocks.forEach(handleEvent);
+                return pump();
+            });
+            
+            return pump();
+        });
+}
+
 // Show typing indicator
 function showTypingIndicator() {
-    const typingHtml = `
-        <div class="message-container ai-message" id="typing-indicator">
-            <div class="message-content">
-                <div class="message-header">
-                    <div class="message-icon">
-                        <i class="fas fa-robot"></i>
-                    </div>
-                    <div class="message-sender">ClinicalGPT</div>
-                </div>
-                <div class="message-body">
-                    <div class="typing-indicator">
-                        <span></span>
-                        <span></span>
-                        <span></span>
-                    </div>
-                </div>
-            </div>
-        </div>
-    `;
-    chatMessagesEl.insertAdjacentHTML('beforeend', typingHtml);
+    chatMessagesEl.appendChild(typingIndicatorTemplate.content.cloneNode(true));
     scrollToBottom();
 }
 
@@ -331,7 +538,7 @@ function addMessage(type, content, timestamp = new Date()) {
     messageEl.className = `message-container ${type}-message`;
     
     // Format timestamp
-    const formattedTime = timestamp.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
+    const formattedTime = TIME_FORMATTER.format(timestamp);
     
     // Set different icon and styling based on message type
     let iconClass, senderName;
@@ -450,14 +657,13 @@ function highlightMedicalTerms(text) {
     let highlightedText = text.replace(medicalTermPattern, '<span class="medical-term">$1</span>');
     
     // Then, get more comprehensive term detection from the server API
-    fetch('/api/detect-medical-terms', {
+    apiRequest(API_ENDPOINTS.detectMedicalTerms, {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
         },
         body: JSON.stringify({ text: text })
     })
-    .then(response => response.json())
     .then(data => {
         if (data.medical_terms && data.medical_terms.length > 0) {
             // Create a temporary div to manipulate the HTML
@@ -590,9 +796,9 @@ function saveChatToHistory() {
         // Add new chat to history
         chatHistory.unshift(chat);
         
-        // Limit history to 20 items
-        if (chatHistory.length > 20) {
-            chatHistory.pop();
+        // Limit history to the most recent chats
+        if (chatHistory.length > MAX_HISTORY_ITEMS) {
+            chatHistory.length = MAX_HISTORY_ITEMS;
         }
     }
     
@@ -608,7 +814,8 @@ function loadChatHistory() {
     const savedHistory = localStorage.getItem('clinicalGptChatHistory');
     if (savedHistory) {
         try {
-            chatHistory = JSON.parse(savedHistory);
+            // Older saves may predate the history cap
+            chatHistory = JSON.parse(savedHistory).slice(0, MAX_HISTORY_ITEMS);
             updateHistoryUI();
         } catch (e) {
             console.error('Error parsing chat history:', e);
@@ -628,17 +835,20 @@ function updateHistoryUI() {
     } else {
         noHistoryMessageEl.classList.add('d-none');
         
+        // Build all items off-document and attach them in one insertion
+        const fragment = document.createDocumentFragment();
+        
         // Add history items
         chatHistory.forEach(chat => {
             const historyItem = document.createElement('div');
             historyItem.className = 'history-item';
+            historyItem.dataset.chatId = chat.id;
             if (chat.id === currentChatId) {
                 historyItem.classList.add('active');
             }
             
             // Format the date
-            const date = new Date(chat.timestamp);
-            const formattedDate = date.toLocaleDateString();
+            const formattedDate = DATE_FORMATTER.format(new Date(chat.timestamp));
             
             historyItem.innerHTML = `
                 <i class="fas fa-comment-medical"></i>
@@ -653,11 +863,20 @@ function updateHistoryUI() {
                 loadChat(chat.id);
             });
             
-            historyListEl.appendChild(historyItem);
+            fragment.appendChild(historyItem);
         });
+        
+        historyListEl.appendChild(fragment);
     }
 }
 
+// Move the active highlight to the given chat without rebuilding the list
+function setActiveHistoryItem(chatId) {
+    historyListEl.querySelectorAll('.history-item').forEach(item => {
+        item.classList.toggle('active', item.dataset.chatId === chatId);
+    });
+}
+
 // Load a chat from history
 function loadChat(chatId) {
     const chat = chatHistory.find(item => item.id === chatId);
@@ -669,7 +888,9 @@ function loadChat(chatId) {
     // Clear current messages
     clearMessages();
     
-    // Add messages from history
+    // Add messages from history, building them off-document so the chat
+    // panel is laid out once rather than once per message
+    const fragment = document.createDocumentFragment();
     chat.messages.forEach(msg => {
         const messageEl = document.createElement('div');
         messageEl.className = `message-container ${msg.type}-message`;
@@ -689,13 +910,14 @@ function loadChat(chatId) {
             </div>
         `;
         
-        chatMessagesEl.appendChild(messageEl);
+        fragment.appendChild(messageEl);
     });
+    chatMessagesEl.appendChild(fragment);
     
     // Update UI
     scrollToBottom();
     updateStatusMessage(`Loaded chat: ${chat.title}`);
-    updateHistoryUI();
+    setActiveHistoryItem(chatId);
     
     // Close sidebar on mobile
     if (window.innerWidth < 768) {
@@ -709,6 +931,40 @@ function openFileUploadModal() {
     fileModal.show();
 }
 
+// Compute a hex SHA-256 digest of a file, or null where Web Crypto is
+// unavailable (it requires a secure context such as https or localhost)
+function hashFile(file) {
+    if (!window.crypto || !window.crypto.subtle) {
+        return Promise.resolve(null);
+    }
+    return file.arrayBuffer()
+        .then(buffer => crypto.subtle.digest('SHA-256', buffer))
+        .then(digest => Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join(''))
+        .catch(error => {
+            console.error('Could not hash file:', error);
+            return null;
+        });
+}
+
+// Look up a cached file analysis by content hash, refreshing its position on a hit
+function getCachedFileResult(hash) {
+    const result = fileResultCache.get(hash);
+    if (result) {
+        fileResultCache.delete(hash);
+        fileResultCache.set(hash, result);
+    }
+    return result || null;
+}
+
+// Store a file analysis, evicting the least recently used entry when full
+function cacheFileResult(hash, result) {
+    fileResultCache.delete(hash);
+    fileResultCache.set(hash, result);
+    if (fileResultCache.size > FILE_CACHE_MAX_ENTRIES) {
+        fileResultCache.delete(fileResultCache.keys().next().value);
+    }
+}
+
 // Handle file upload
 function handleFileUpload() {
     const file = fileUploadEl.files[0];
@@ -733,20 +989,28 @@ function handleFileUpload() {
     
     updateStatusMessage('Uploading and processing file...');
     
-    fetch(`${API_URL}/api/process-file`, {
-        method: 'POST',
-        body: formData
-    })
-    .then(response => {
-        if (!response.ok) {
-            throw new Error(`Server returned status: ${response.status}`);
+    // Files already analysed in this session are answered without re-uploading
+    let fileHash = null;
+    hashFile(file)
+    .then(hash => {
+        fileHash = hash;
+        const cachedResult = hash ? getCachedFileResult(hash) : null;
+        if (cachedResult) {
+            return Object.assign({}, cachedResult);
         }
-        return response.json();
+        return apiRequest(API_ENDPOINTS.processFile, {
+            method: 'POST',
+            body: formData
+        });
     })
     .then(data => {
         // Remove typing indicator
         removeTypingIndicator();
         
+        if (fileHash && !data.error) {
+            cacheFileResult(fileHash, Object.assign({}, data));
+        }
+        
         // Add file name to the data
         data.file_name = file.name;
         
@@ -772,6 +1036,11 @@ function handleFileUpload() {
         fileUploadEl.value = '';
         
         updateStatusMessage('Error processing file', true);
+        
+        // fetch() rejects with a TypeError when the server is unreachable
+        if (error instanceof TypeError) {
+            checkServerStatus(true);
+        }
     });
 }
 
@@ -3,6 +3,7 @@ Hardware device detection and configuration
 """
 import os
 import logging
+from functools import lru_cache
 import torch
 
 logger = logging.getLogger(__name__)
@@ -118,8 +119,13 @@ def detect_devices():
     
     return device_config
 
+@lru_cache(maxsize=1)
 def get_device_details():
-    """Get detailed information about available devices"""
+    """Get detailed information about available devices
+    
+    The hardware does not change while the server runs, so the CUDA driver is
+    only queried once; callers must not mutate the returned dict.
+    """
     details = {}
     
     try:
@@ -0,0 +1,45 @@
+"""
+Flask JSON provider backed by orjson
+"""
+import logging
+from flask.json.provider import DefaultJSONProvider
+
+# Try to import orjson (optional, falls back to Flask's stdlib json provider)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+logger = logging.getLogger(__name__)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serialize jsonify() responses and parse request.json with orjson
+    
+    Query responses carry the full text of every web result, which the stdlib
+    encoder walks in pure Python. orjson encodes straight to bytes in C.
+    """
+    
+    # Allow the integer keys the stdlib encoder accepts
+    option = orjson.OPT_NON_STR_KEYS if HAS_ORJSON else 0
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.option),
+            mimetype=self.mimetype
+        )
+
+def init_json_provider(app):
+    """Use orjson for the app's JSON handling when it is installed"""
+    if HAS_ORJSON:
+        app.json = OrjsonProvider(app)
+        logger.info("Using orjson for JSON serialization")
+    else:
+        logger.info("orjson not available, using the standard JSON provider")
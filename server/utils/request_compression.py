@@ -0,0 +1,80 @@
+"""
+WSGI middleware for accepting gzip-compressed request bodies
+"""
+import io
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+class GzipRequestMiddleware:
+    """Transparently decompress request bodies sent with Content-Encoding: gzip
+
+    Flask has no built-in support for compressed request bodies, so this sits in
+    front of the app and hands it a plain body. With max_size set, the compressed
+    body must declare a Content-Length no larger than max_size, and decompressed
+    output is capped at max_size bytes so a small payload cannot expand without bound.
+    """
+
+    def __init__(self, app, max_size=None):
+        self.app = app
+        self.max_size = max_size
+
+    def __call__(self, environ, start_response):
+        if environ.get('HTTP_CONTENT_ENCODING', '').strip().lower() != 'gzip':
+            return self.app(environ, start_response)
+
+        try:
+            content_length = int(environ.get('CONTENT_LENGTH') or -1)
+        except ValueError:
+            return self._error(start_response, '400 Bad Request', b'{"error": "Invalid Content-Length"}')
+
+        # Refuse unbounded or oversized compressed bodies before reading any of them
+        if self.max_size is not None and not 0 <= content_length <= self.max_size:
+            logger.warning(f"Rejected gzip request body without a Content-Length of at most {self.max_size} bytes")
+            return self._error(start_response, '413 Request Entity Too Large', b'{"error": "Request body too large"}')
+
+        try:
+            body = self._decompress(environ['wsgi.input'], content_length)
+        except zlib.error as e:
+            logger.warning(f"Rejected malformed gzip request body: {str(e)}")
+            return self._error(start_response, '400 Bad Request', b'{"error": "Invalid gzip request body"}')
+
+        if body is None:
+            logger.warning(f"Rejected gzip request body larger than {self.max_size} bytes")
+            return self._error(start_response, '413 Request Entity Too Large', b'{"error": "Request body too large"}')
+
+        environ['wsgi.input'] = io.BytesIO(body)
+        environ['CONTENT_LENGTH'] = str(len(body))
+        del environ['HTTP_CONTENT_ENCODING']
+        return self.app(environ, start_response)
+
+    def _decompress(self, stream, content_length):
+        """Decompress the request body, returning None if it exceeds max_size
+
+        A content_length of -1 (none declared) reads to the end of the stream.
+        Raises zlib.error for a malformed or truncated gzip stream.
+        """
+        compressed = stream.read(content_length) if content_length >= 0 else stream.read()
+
+        # 16 + MAX_WBITS selects the gzip container format
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self.max_size is None:
+            body = decompressor.decompress(compressed) + decompressor.flush()
+        else:
+            body = decompressor.decompress(compressed, self.max_size + 1)
+            if len(body) > self.max_size:
+                return None
+
+        if not decompressor.eof:
+            raise zlib.error("gzip stream is truncated")
+        return body
+
+    @staticmethod
+    def _error(start_response, status, payload):
+        """Send a small JSON error response without involving the app"""
+        start_response(status, [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(payload)))
+        ])
+        return [payload]
@@ -0,0 +1,31 @@
+"""
+ClinicalGPT Medical Assistant - WSGI entry point
+Exposes the Flask app for a production WSGI server, which keeps client
+connections alive between requests (the built-in dev server does not).
+
+    waitress-serve --threads=16 --connection-limit=200 server.wsgi:app
+    gunicorn server.wsgi:app              (settings in gunicorn.conf.py)
+
+The app, and with it the model, is created when this module is imported.
+
+Running `python -m server.wsgi` starts waitress with the same settings,
+using SERVER_THREADS request threads; this is what run.bat does.
+"""
+import logging
+
+from server.server import create_app
+
+logger = logging.getLogger(__name__)
+
+app = create_app()
+config = app.config['CLINICALGPT']
+
+def serve():
+    """Serve the app with waitress on the configured port"""
+    from waitress import serve as waitress_serve
+
+    logger.info(f"Starting waitress on http://localhost:{config['port']}")
+    waitress_serve(app, host='0.0.0.0', port=config['port'], threads=config['server_threads'], connection_limit=200)
+
+if __name__ == '__main__':
+    serve()
@@ -4,6 +4,7 @@ Module for processing and analyzing CSV files.
 import csv
 import io
 import logging
+from collections import deque
 
 # Internal imports
 from .text_processor import process_text_chunk
@@ -12,31 +13,42 @@ logger = logging.getLogger(__name__)
 
 def process_csv_file(file, model, tokenizer, device):
     """Process a CSV file with medical data"""
-    content = file.read().decode('utf-8')
-    
-    # Parse CSV
-    reader = csv.reader(io.StringIO(content))
-    headers = next(reader, [])
-    rows = list(reader)
+    # Read rows straight off the upload stream instead of decoding the whole
+    # payload into memory; only the head and tail rows are kept for analysis
+    stream = io.TextIOWrapper(getattr(file, 'stream', file), encoding='utf-8', newline='')
+    try:
+        reader = csv.reader(stream)
+        headers = next(reader, [])
+        head_rows = []
+        tail_rows = deque(maxlen=3)
+        row_count = 0
+        for row in reader:
+            if row_count < 5:
+                head_rows.append(row)
+            tail_rows.append(row)
+            row_count += 1
+    finally:
+        # Leave the underlying upload stream open for the caller
+        stream.detach()
     
     # Extract key columns for analysis
-    summary = f"Analyzed CSV file with {len(rows)} rows and {len(headers)} columns.\n"
+    summary = f"Analyzed CSV file with {row_count} rows and {len(headers)} columns.\n"
     summary += f"Headers: {', '.join(headers)}\n\n"
     
     # If the CSV is small enough, provide a sample analysis
-    if len(rows) <= 10:
-        text_to_analyze = summary + "\n".join([", ".join(row) for row in rows[:5]])
+    if row_count <= 10:
+        text_to_analyze = summary + "\n".join([", ".join(row) for row in head_rows])
     else:
         # Select a subset of rows for analysis
-        text_to_analyze = summary + "\n".join([", ".join(row) for row in rows[:5]])
-        text_to_analyze += "\n...\n" + "\n".join([", ".join(row) for row in rows[-3:]])
+        text_to_analyze = summary + "\n".join([", ".join(row) for row in head_rows])
+        text_to_analyze += "\n...\n" + "\n".join([", ".join(row) for row in tail_rows])
     
     # Process the extracted text
     result = process_text_chunk(text_to_analyze, model, tokenizer, device)
     
     return {
         "file_type": "csv",
-        "rows": len(rows),
+        "rows": row_count,
         "columns": len(headers),
         "headers": headers,
         "response": result.get("response", "No analysis available.")
@@ -2,7 +2,6 @@
 Module for processing and analyzing medical images.
 """
 import os
-import tempfile
 import logging
 import numpy as np
 from PIL import Image, ImageEnhance, ImageFilter
@@ -22,14 +21,17 @@ logger = logging.getLogger(__name__)
 
 def process_image_file(file, model, tokenizer, device):
     """Process an image file with medical content using OCR"""
+    image = None
     try:
-        # Save the uploaded file temporarily
-        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as temp_file:
-            temp_path = temp_file.name
-            file.save(temp_path)
+        # Read the image straight from the upload stream rather than copying it to
+        # a temporary file first; Werkzeug already spools large uploads to disk
+        stream = getattr(file, 'stream', file)
+        stream.seek(0, os.SEEK_END)
+        file_size = stream.tell()
+        stream.seek(0)
         
-        # Open the image for analysis
-        image = Image.open(temp_path)
+        # Open the image for analysis (PIL decodes pixel data lazily)
+        image = Image.open(stream)
         
         # Extract basic image metadata
         width, height = image.size
@@ -60,7 +62,7 @@ Medical Image Analysis:
 - Dimensions: {width}x{height}
 - Format: {format_name}
 - Color Mode: {mode}
-- File Size: {os.path.getsize(temp_path) / 1024:.1f} KB
+- File Size: {file_size / 1024:.1f} KB
 
 Image Characteristics:
 {image_analysis}
@@ -81,12 +83,9 @@ OCR Extracted Text:
             "response": result.get("response", "No analysis available.")
         }
     finally:
-        # Clean up the temporary file
-        if 'temp_path' in locals():
-            try:
-                os.unlink(temp_path)
-            except:
-                pass
+        # Release the decoded image; the upload stream belongs to the caller
+        if image is not None:
+            image.close()
 
 def preprocess_for_ocr(image):
     """Preprocess an image to improve OCR results"""
@@ -4,27 +4,47 @@ Module for processing and analyzing JSON files.
 import json
 import logging
 
+# Try to import orjson for faster parsing of large uploads (optional)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 # Internal imports
 from .text_processor import process_text_chunk
 
 logger = logging.getLogger(__name__)
 
+def _loads(raw):
+    """Parse raw JSON bytes, using orjson when available"""
+    if HAS_ORJSON:
+        return orjson.loads(raw)
+    return json.loads(raw.decode('utf-8'))
+
+def _dumps_indented(data):
+    """Pretty-print JSON data for analysis, using orjson when available"""
+    if HAS_ORJSON:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(data, indent=2)
+
 def process_json_file(file, model, tokenizer, device):
     """Process a JSON file with medical data"""
-    content = file.read().decode('utf-8')
+    raw = file.read()
     
     try:
-        json_data = json.loads(content)
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError, so one handler covers both
+        json_data = _loads(raw)
         
         # Convert JSON to a readable format for analysis
         if isinstance(json_data, dict):
-            text_to_analyze = json.dumps(json_data, indent=2)
+            text_to_analyze = _dumps_indented(json_data)
         elif isinstance(json_data, list) and len(json_data) > 0:
             # If it's a list, take a sample for analysis
             sample = json_data[:5] if len(json_data) > 5 else json_data
-            text_to_analyze = json.dumps(sample, indent=2)
+            text_to_analyze = _dumps_indented(sample)
         else:
-            text_to_analyze = content
+            text_to_analyze = raw.decode('utf-8')
         
         # Process the extracted text
         result = process_text_chunk(text_to_analyze, model, tokenizer, device)
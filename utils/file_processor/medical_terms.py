@@ -7,6 +7,7 @@ import logging
 import spacy
 import numpy as np
 from collections import Counter
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -59,7 +60,7 @@ Medical terms:"""
             inputs = {key: val.to(device) for key, val in inputs.items()}
             
             # Generate response
-            with torch.no_grad():
+            with torch.inference_mode():
                 output = model.generate(
                     inputs["input_ids"],
                     max_length=512,
@@ -85,39 +86,69 @@ Medical terms:"""
         except Exception as e:
             logger.error(f"Error using LLM for medical term detection: {str(e)}")
     
-    # Method 2: Use spaCy for entity detection as backup
+    # Methods 2 and 3 depend only on the text, so their results are memoized
+    medical_terms.update(_detect_terms_with_nlp(text))
+    
+    # Convert set back to list and sort alphabetically
+    return sorted(list(medical_terms))
+
+# Texts up to this length (highlighted responses rather than whole documents) are memoized
+NLP_CACHE_MAX_CHARS = 4000
+
+def _detect_terms_with_nlp(text):
+    """Detect medical terms with spaCy and pattern matching
+
+    The same responses are often highlighted repeatedly, so short texts skip the
+    spaCy pipeline and the terminology scan when seen again. Longer texts are not
+    memoized, and a failed spaCy run never is.
+    """
+    try:
+        if len(text) <= NLP_CACHE_MAX_CHARS:
+            return _detect_terms_with_nlp_cached(text)
+        return _detect_terms_with_spacy(text) | _detect_terms_with_patterns(text)
+    except Exception as e:
+        logger.error(f"Error in spaCy processing: {str(e)}")
+        return _detect_terms_with_patterns(text)
+
+@lru_cache(maxsize=256)
+def _detect_terms_with_nlp_cached(text):
+    """Memoized spaCy and pattern matching; exceptions propagate and are not cached"""
+    return _detect_terms_with_spacy(text) | _detect_terms_with_patterns(text)
+
+def _detect_terms_with_spacy(text):
+    """Method 2: use spaCy entity detection as backup"""
+    medical_terms = set()
     if nlp:
-        try:
-            doc = nlp(text)
-            
-            # Extract entities that are likely medical terms
-            for ent in doc.ents:
-                if ent.label_ in ["DISEASE", "CHEMICAL", "PROCEDURE", "ANATOMY", "MEDICALCONDITION", 
-                                  "SYMPTOM", "TREATMENT", "DRUG", "MEDICATION", "B-DISO", "I-DISO", 
-                                  "B-PROC", "I-PROC", "B-ANAT", "I-ANAT", "UMLS"]:
-                    medical_terms.add(ent.text.lower())
-            
-            # Look for medical terms in noun chunks (for when entity recognition misses some terms)
-            for chunk in doc.noun_chunks:
-                # Filter by frequency in medical contexts
-                if chunk.text.lower() in MEDICAL_TERMS_FREQUENCY:
-                    medical_terms.add(chunk.text.lower())
-                    
-            logger.info(f"spaCy identified additional medical terms")
-        except Exception as e:
-            logger.error(f"Error in spaCy processing: {str(e)}")
+        doc = nlp(text)
+        
+        # Extract entities that are likely medical terms
+        for ent in doc.ents:
+            if ent.label_ in ["DISEASE", "CHEMICAL", "PROCEDURE", "ANATOMY", "MEDICALCONDITION", 
+                              "SYMPTOM", "TREATMENT", "DRUG", "MEDICATION", "B-DISO", "I-DISO", 
+                              "B-PROC", "I-PROC", "B-ANAT", "I-ANAT", "UMLS"]:
+                medical_terms.add(ent.text.lower())
+        
+        # Look for medical terms in noun chunks (for when entity recognition misses some terms)
+        for chunk in doc.noun_chunks:
+            # Filter by frequency in medical contexts
+            if chunk.text.lower() in MEDICAL_TERMS_FREQUENCY:
+                medical_terms.add(chunk.text.lower())
+                
+        logger.info(f"spaCy identified additional medical terms")
     
-    # Method 3: Use regex with comprehensive medical terminology (fallback)
-    terms_before = len(medical_terms)
+    return frozenset(medical_terms)
+
+def _detect_terms_with_patterns(text):
+    """Method 3: use regex with comprehensive medical terminology (fallback)"""
+    medical_terms = set()
     for term_category, terms in MEDICAL_TERMINOLOGY.items():
         for term in terms:
             if re.search(r'\b' + re.escape(term) + r'\b', text.lower()):
                 medical_terms.add(term)
     
-    logger.info(f"Pattern matching added {len(medical_terms) - terms_before} additional terms")
+    logger.info(f"Pattern matching added {len(medical_terms)} terms")
     
-    # Convert set back to list and sort alphabetically
-    return sorted(list(medical_terms))
+    return frozenset(medical_terms)
 
 # More comprehensive medical terminology database
 MEDICAL_TERMINOLOGY = {
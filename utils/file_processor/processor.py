@@ -6,6 +6,13 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# File extensions that process_file knows how to handle
+SUPPORTED_EXTENSIONS = frozenset({'.txt', '.csv', '.json', '.jpg', '.jpeg', '.png', '.pdf'})
+
+def is_supported_file(filename):
+    """Check whether a filename has an extension process_file can handle"""
+    return os.path.splitext(filename)[1].lower() in SUPPORTED_EXTENSIONS
+
 def process_file(file, model, tokenizer, device):
     """Process different types of medical files
     
@@ -54,7 +54,7 @@ def process_text_chunk(text, model, tokenizer, device):
         inputs = {key: val.to(device) for key, val in inputs.items()}
         
         # Generate response with the causal language model
-        with torch.no_grad():
+        with torch.inference_mode():
             output = model.generate(
                 inputs["input_ids"],
                 max_length=1024,
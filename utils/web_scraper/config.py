@@ -67,7 +67,10 @@ def get_search_settings():
     settings = {
         'max_results': 5,
         'timeout_seconds': 10,
-        'enable_detailed_content': True
+        'enable_detailed_content': True,
+        'search_deadline_seconds': 12,
+        # Results for a repeated query are reused for this long; 0 disables the cache
+        'cache_ttl_seconds': 3600
     }
     
     if os.path.exists(config_path):
@@ -84,6 +87,12 @@ def get_search_settings():
                     
                 if 'enable_detailed_content' in section:
                     settings['enable_detailed_content'] = section.getboolean('enable_detailed_content')
+                
+                if 'search_deadline_seconds' in section:
+                    settings['search_deadline_seconds'] = section.getfloat('search_deadline_seconds')
+                
+                if 'cache_ttl_seconds' in section:
+                    settings['cache_ttl_seconds'] = section.getint('cache_ttl_seconds')
                     
             logger.info(f"Loaded search settings from config: {settings}")
         except Exception as e:
@@ -1,16 +1,30 @@
 """
 Module for extracting detailed content from medical web pages
 """
+import os
 import logging
 import time
 import random
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 
-from .utils import get_common_headers, clean_text
+from .utils import get_common_headers, get_session, clean_text
 
 logger = logging.getLogger(__name__)
 
+# Page fetches one search can issue: five providers with up to five results each
+_DETAIL_FETCHES_PER_SEARCH = 25
+
+# Separate pool for per-result page fetches; providers already run on the search
+# pool and block on these, so sharing that pool could starve it. Like the search
+# pool it is sized for every request thread searching at once, so no fetch waits
+# for a worker while its search deadline runs
+_detail_executor = ThreadPoolExecutor(
+    max_workers=_DETAIL_FETCHES_PER_SEARCH * int(os.environ.get('SERVER_THREADS', 16)),
+    thread_name_prefix="medical-detail"
+)
+
 def get_detailed_content(url, max_length=1000):
     """Visit a specific page and extract more detailed content"""
     try:
@@ -18,7 +32,7 @@ def get_detailed_content(url, max_length=1000):
         time.sleep(random.uniform(0.1, 0.5))
         
         headers = get_common_headers()
-        response = requests.get(url, headers=headers, timeout=8)
+        response = get_session().get(url, headers=headers, timeout=8)
         
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -54,7 +68,7 @@ def get_detailed_content(url, max_length=1000):
             
             return content
     
-    except Exception as e:
+    except requests.RequestException as e:
         logger.error(f"Error getting detailed content from {url}: {str(e)}")
     
     return None
@@ -68,7 +82,7 @@ def get_pubmed_abstract(article_id):
         # Add a small delay to avoid overloading PubMed servers
         time.sleep(random.uniform(0.2, 0.7))
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = get_session().get(url, headers=headers, timeout=10)
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
             
@@ -82,7 +96,30 @@ def get_pubmed_abstract(article_id):
                 abstract_text = abstract_elem.get_text(strip=True)
                 return clean_text(abstract_text)
     
-    except Exception as e:
+    except requests.RequestException as e:
         logger.error(f"Error fetching PubMed abstract for ID {article_id}: {str(e)}")
     
     return None
+
+def _fetch_concurrently(fetch_func, keys):
+    """Run a fetch function over several keys in parallel, preserving order
+
+    The fetch functions handle request errors themselves; anything else they
+    raise propagates to the calling provider's error log.
+    """
+    futures = [_detail_executor.submit(fetch_func, key) for key in keys]
+    return [future.result() for future in futures]
+
+def get_detailed_contents(urls, max_length=1000):
+    """Fetch detailed content for several pages at once
+
+    Returns a list aligned with urls, holding None where a page could not be read.
+    """
+    return _fetch_concurrently(lambda url: get_detailed_content(url, max_length), urls)
+
+def get_pubmed_abstracts(article_ids):
+    """Fetch abstracts for several PubMed articles at once
+
+    Returns a list aligned with article_ids, holding None where no abstract was found.
+    """
+    return _fetch_concurrently(get_pubmed_abstract, article_ids)
@@ -1,8 +1,12 @@
 """
 Core functionality for searching medical sites
 """
+import os
+import time
 import logging
-from concurrent.futures import ThreadPoolExecutor
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
 
 from .config import get_search_settings
 from .providers import SEARCH_PROVIDERS
@@ -10,6 +14,43 @@ from .utils import sanitize_query
 
 logger = logging.getLogger(__name__)
 
+# Long-lived pool shared by all searches, so each query fans out to the
+# providers without paying for thread start-up and teardown. Every request
+# thread may be searching at once, so the pool holds a full set of provider
+# workers per thread; otherwise one search queues behind another and spends
+# its deadline waiting for a worker.
+_executor = ThreadPoolExecutor(
+    max_workers=len(SEARCH_PROVIDERS) * int(os.environ.get('SERVER_THREADS', 16)),
+    thread_name_prefix="medical-search"
+)
+
+# Recent search results keyed by (query, max_results), oldest first, so a repeated
+# question skips every provider round trip while its entry is fresh
+_RESULT_CACHE_MAX_ENTRIES = 1024
+_result_cache = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+def _get_cached_results(key, ttl_seconds):
+    """Return cached results for a search if they are younger than ttl_seconds"""
+    with _result_cache_lock:
+        entry = _result_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, results = entry
+        if time.monotonic() - stored_at > ttl_seconds:
+            del _result_cache[key]
+            return None
+        _result_cache.move_to_end(key)
+        return list(results)
+
+def _cache_results(key, results):
+    """Store search results, evicting the least recently used entry when full"""
+    with _result_cache_lock:
+        _result_cache[key] = (time.monotonic(), list(results))
+        _result_cache.move_to_end(key)
+        if len(_result_cache) > _RESULT_CACHE_MAX_ENTRIES:
+            _result_cache.popitem(last=False)
+
 def search_medical_sites(query, max_results=None):
     """Search for information from trusted medical sites with parallel requests
     
@@ -29,18 +70,26 @@ def search_medical_sites(query, max_results=None):
     if max_results is not None:
         settings['max_results'] = max_results
     
+    cache_key = (sanitized_query.lower(), settings['max_results'])
+    if settings['cache_ttl_seconds'] > 0:
+        cached = _get_cached_results(cache_key, settings['cache_ttl_seconds'])
+        if cached is not None:
+            logger.info(f"Using cached search results for: {sanitized_query}")
+            return cached
+    
     all_results = []
     
-    # Use ThreadPoolExecutor for parallel execution
-    with ThreadPoolExecutor(max_workers=len(SEARCH_PROVIDERS)) as executor:
-        # Submit all search tasks
-        future_to_search = {
-            executor.submit(search_func, sanitized_query): search_func.__name__ 
-            for search_func in SEARCH_PROVIDERS
-        }
-        
-        # Process results as they complete
-        for future in future_to_search:
+    # Submit all search tasks to the shared pool
+    future_to_search = {
+        _executor.submit(search_func, sanitized_query): search_func.__name__ 
+        for search_func in SEARCH_PROVIDERS
+    }
+    
+    # Process results as they complete so a slow provider doesn't hold up the rest.
+    # Providers still running at the deadline are left to finish in the background
+    # and their results dropped, so generation never waits on the slowest site.
+    try:
+        for future in as_completed(future_to_search, timeout=settings['search_deadline_seconds']):
             search_name = future_to_search[future]
             try:
                 results = future.result()
@@ -49,6 +98,9 @@ def search_medical_sites(query, max_results=None):
                     all_results.extend(results)
             except Exception as e:
                 logger.error(f"Error in {search_name}: {str(e)}")
+    except TimeoutError:
+        pending = [name for future, name in future_to_search.items() if not future.done()]
+        logger.warning(f"Search deadline reached, skipping slow providers: {', '.join(pending)}")
     
     # Sort results by content length (prioritize detailed information)
     all_results.sort(key=lambda x: len(x.get('content', '')), reverse=True)
@@ -64,4 +116,8 @@ def search_medical_sites(query, max_results=None):
             unique_results.append(result)
     
     logger.info(f"Total unique results found: {len(unique_results)}")
-    return unique_results[:settings['max_results']]
+    results = unique_results[:settings['max_results']]
+    # An empty result usually means the providers failed or timed out, so it is not kept
+    if results and settings['cache_ttl_seconds'] > 0:
+        _cache_results(cache_key, results)
+    return results
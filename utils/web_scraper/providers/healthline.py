@@ -2,12 +2,11 @@
 Healthline search provider
 """
 import logging
-import requests
 from bs4 import BeautifulSoup
 
-from ..utils import get_common_headers
+from ..utils import get_common_headers, get_session
 from ..config import get_search_settings
-from ..content_extractor import get_detailed_content
+from ..content_extractor import get_detailed_contents
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +18,7 @@ def search_healthline(query):
         url = f"https://www.healthline.com/search?q1={query}"
         headers = get_common_headers()
         
-        response = requests.get(url, headers=headers, timeout=settings['timeout_seconds'])
+        response = get_session().get(url, headers=headers, timeout=settings['timeout_seconds'])
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
             results = []
@@ -32,25 +31,24 @@ def search_healthline(query):
                     if not link.startswith('http'):
                         link = f"https://www.healthline.com{link}"
                     
-                    # Get detailed content only if enabled
-                    if settings['enable_detailed_content']:
-                        detailed_content = get_detailed_content(link)
-                        if detailed_content:
-                            results.append({
-                                "source": link,
-                                "title": title,
-                                "content": detailed_content
-                            })
-                    else:
-                        # Use just the title as we don't have a snippet directly
-                        results.append({
-                            "source": link,
-                            "title": title,
-                            "content": title
-                        })
+                    # Use just the title as we don't have a snippet directly
+                    results.append({
+                        "source": link,
+                        "title": title,
+                        "content": title
+                    })
                 except Exception as e:
                     logger.error(f"Error extracting Healthline result: {str(e)}")
             
+            # Get detailed content only if enabled, keeping only pages that yielded some
+            if settings['enable_detailed_content']:
+                detailed_contents = get_detailed_contents([result["source"] for result in results])
+                results = [
+                    {**result, "content": detailed_content}
+                    for result, detailed_content in zip(results, detailed_contents)
+                    if detailed_content
+                ]
+            
             return results
     except Exception as e:
         logger.error(f"Error during Healthline search: {str(e)}")
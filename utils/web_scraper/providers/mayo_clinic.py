@@ -2,12 +2,11 @@
 Mayo Clinic search provider
 """
 import logging
-import requests
 from bs4 import BeautifulSoup
 
-from ..utils import get_common_headers, clean_text
+from ..utils import get_common_headers, get_session, clean_text
 from ..config import get_search_settings
-from ..content_extractor import get_detailed_content
+from ..content_extractor import get_detailed_contents
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +18,7 @@ def search_mayo_clinic(query):
         url = f"https://www.mayoclinic.org/search/search-results?q={query}"
         headers = get_common_headers()
         
-        response = requests.get(url, headers=headers, timeout=settings['timeout_seconds'])
+        response = get_session().get(url, headers=headers, timeout=settings['timeout_seconds'])
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
             results = []
@@ -37,21 +36,21 @@ def search_mayo_clinic(query):
                             link = f"https://www.mayoclinic.org{link}"
                         snippet = clean_text(snippet_elem.text)
                         
-                        # Try to get more comprehensive content by visiting the actual page
-                        if settings['enable_detailed_content']:
-                            detailed_content = get_detailed_content(link)
-                            content = detailed_content if detailed_content else snippet
-                        else:
-                            content = snippet
-                        
                         results.append({
                             "source": link,
                             "title": title,
-                            "content": content
+                            "content": snippet
                         })
                 except Exception as e:
                     logger.error(f"Error extracting Mayo Clinic result: {str(e)}")
             
+            # Try to get more comprehensive content by visiting the actual pages in parallel
+            if settings['enable_detailed_content']:
+                detailed_contents = get_detailed_contents([result["source"] for result in results])
+                for result, detailed_content in zip(results, detailed_contents):
+                    if detailed_content:
+                        result["content"] = detailed_content
+            
             return results
     except Exception as e:
         logger.error(f"Error during Mayo Clinic search: {str(e)}")
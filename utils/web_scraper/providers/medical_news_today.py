@@ -2,12 +2,11 @@
 Medical News Today search provider
 """
 import logging
-import requests
 from bs4 import BeautifulSoup
 
-from ..utils import get_common_headers
+from ..utils import get_common_headers, get_session
 from ..config import get_search_settings
-from ..content_extractor import get_detailed_content
+from ..content_extractor import get_detailed_contents
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +18,7 @@ def search_medical_news_today(query):
         url = f"https://www.medicalnewstoday.com/search?q={query}"
         headers = get_common_headers()
         
-        response = requests.get(url, headers=headers, timeout=settings['timeout_seconds'])
+        response = get_session().get(url, headers=headers, timeout=settings['timeout_seconds'])
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
             results = []
@@ -35,25 +34,25 @@ def search_medical_news_today(query):
                         if not link.startswith('http'):
                             link = f"https://www.medicalnewstoday.com{link}"
                         
-                        # Get detailed content from the article page if enabled
-                        if settings['enable_detailed_content']:
-                            detailed_content = get_detailed_content(link)
-                            if detailed_content:
-                                results.append({
-                                    "source": link,
-                                    "title": title,
-                                    "content": detailed_content
-                                })
-                        else:
-                            # Use just the title if we're not getting detailed content
-                            results.append({
-                                "source": link,
-                                "title": title,
-                                "content": title
-                            })
+                        # Use just the title if we're not getting detailed content
+                        results.append({
+                            "source": link,
+                            "title": title,
+                            "content": title
+                        })
                 except Exception as e:
                     logger.error(f"Error extracting Medical News Today result: {str(e)}")
             
+            # Get detailed content from the article pages in parallel if enabled,
+            # keeping only pages that yielded some
+            if settings['enable_detailed_content']:
+                detailed_contents = get_detailed_contents([result["source"] for result in results])
+                results = [
+                    {**result, "content": detailed_content}
+                    for result, detailed_content in zip(results, detailed_contents)
+                    if detailed_content
+                ]
+            
             return results
     except Exception as e:
         logger.error(f"Error during Medical News Today search: {str(e)}")
@@ -2,10 +2,9 @@
 NIH (National Institutes of Health) search provider
 """
 import logging
-import requests
 from bs4 import BeautifulSoup
 
-from ..utils import get_common_headers, clean_text
+from ..utils import get_common_headers, get_session, clean_text
 from ..config import is_trusted_domain, get_search_settings
 
 logger = logging.getLogger(__name__)
@@ -18,7 +17,7 @@ def search_nih(query):
         url = f"https://search.nih.gov/search?utf8=%E2%9C%93&affiliate=nih&query={query}"
         headers = get_common_headers()
         
-        response = requests.get(url, headers=headers, timeout=settings['timeout_seconds'])
+        response = get_session().get(url, headers=headers, timeout=settings['timeout_seconds'])
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
             results = []
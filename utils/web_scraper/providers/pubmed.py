@@ -2,12 +2,11 @@
 PubMed search provider for medical research
 """
 import logging
-import requests
 from bs4 import BeautifulSoup
 
-from ..utils import get_common_headers, clean_text
+from ..utils import get_common_headers, get_session, clean_text
 from ..config import get_search_settings
-from ..content_extractor import get_pubmed_abstract
+from ..content_extractor import get_pubmed_abstracts
 
 logger = logging.getLogger(__name__)
 
@@ -19,10 +18,11 @@ def search_pubmed(query):
         url = f"https://pubmed.ncbi.nlm.nih.gov/?term={query.replace(' ', '+')}"
         headers = get_common_headers()
         
-        response = requests.get(url, headers=headers, timeout=15)  # Longer timeout for PubMed
+        response = get_session().get(url, headers=headers, timeout=15)  # Longer timeout for PubMed
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
             results = []
+            article_ids = []
             
             # Extract search results
             for result in soup.select('.docsum-content')[:5]:
@@ -44,21 +44,22 @@ def search_pubmed(query):
                         if journal:
                             snippet += journal.text.strip()
                         
-                        # If we have article ID and detailed content is enabled, try to get abstract
-                        if settings['enable_detailed_content']:
-                            detailed_content = get_pubmed_abstract(article_id)
-                            content = detailed_content if detailed_content else snippet
-                        else:
-                            content = snippet
-                        
                         results.append({
                             "source": link,
                             "title": title,
-                            "content": content
+                            "content": snippet
                         })
+                        article_ids.append(article_id)
                 except Exception as e:
                     logger.error(f"Error extracting PubMed result: {str(e)}")
             
+            # If detailed content is enabled, fetch all abstracts in parallel
+            if settings['enable_detailed_content']:
+                abstracts = get_pubmed_abstracts(article_ids)
+                for result, abstract in zip(results, abstracts):
+                    if abstract:
+                        result["content"] = abstract
+            
             return results
     except Exception as e:
         logger.error(f"Error during PubMed search: {str(e)}")
@@ -2,13 +2,12 @@
 Reuters Health News search provider
 """
 import logging
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, quote_plus
 
-from ..utils import get_common_headers, clean_text
+from ..utils import get_common_headers, get_session, clean_text
 from ..config import get_search_settings, is_trusted_domain
-from ..content_extractor import get_detailed_content
+from ..content_extractor import get_detailed_contents
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +20,7 @@ def search_reuters_health(query):
     
     try:
         headers = get_common_headers()
-        response = requests.get(search_url, headers=headers, timeout=settings['timeout_seconds'])
+        response = get_session().get(search_url, headers=headers, timeout=settings['timeout_seconds'])
         
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -48,22 +47,22 @@ def search_reuters_health(query):
 
                         # Get snippet or fallback to title
                         snippet = clean_text(snippet_elem.text) if snippet_elem else title
-                        
-                        # Try to get more detailed content if enabled
-                        if settings['enable_detailed_content']:
-                            detailed_content = get_detailed_content(link)
-                            content = detailed_content if detailed_content else snippet
-                        else:
-                            content = snippet
 
                         results.append({
                             "source": link,
                             "title": title,
-                            "content": content
+                            "content": snippet
                         })
                 except Exception as e:
                     logger.error(f"Error extracting Reuters result: {str(e)}")
             
+            # Try to get more detailed content if enabled, fetching all pages in parallel
+            if settings['enable_detailed_content']:
+                detailed_contents = get_detailed_contents([result["source"] for result in results])
+                for result, detailed_content in zip(results, detailed_contents):
+                    if detailed_content:
+                        result["content"] = detailed_content
+            
             logger.info(f"Reuters Health search returned {len(results)} results.")
             return results
         else:
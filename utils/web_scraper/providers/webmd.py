@@ -2,10 +2,9 @@
 WebMD search provider
 """
 import logging
-import requests
 from bs4 import BeautifulSoup
 
-from ..utils import get_common_headers, clean_text
+from ..utils import get_common_headers, get_session, clean_text
 from ..config import get_search_settings
 
 logger = logging.getLogger(__name__)
@@ -18,7 +17,7 @@ def search_webmd(query):
         url = f"https://www.webmd.com/search/search_results/default.aspx?query={query}"
         headers = get_common_headers()
         
-        response = requests.get(url, headers=headers, timeout=settings['timeout_seconds'])
+        response = get_session().get(url, headers=headers, timeout=settings['timeout_seconds'])
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
             results = []
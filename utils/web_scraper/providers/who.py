@@ -2,11 +2,10 @@
 WHO (World Health Organization) search provider
 """
 import logging
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 
-from ..utils import get_common_headers, clean_text
+from ..utils import get_common_headers, get_session, clean_text
 from ..config import get_search_settings, is_trusted_domain
 
 logger = logging.getLogger(__name__)
@@ -21,7 +20,7 @@ def search_who(query):
         search_url = f"{base_url}/search?query={query}"
         headers = get_common_headers()
         
-        response = requests.get(search_url, headers=headers, timeout=settings['timeout_seconds'])
+        response = get_session().get(search_url, headers=headers, timeout=settings['timeout_seconds'])
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
             results = []
@@ -5,8 +5,41 @@ import re
 import random
 import logging
 
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 logger = logging.getLogger(__name__)
 
+def _create_session():
+    """Create an HTTP session with pooled keep-alive connections and light retries"""
+    session = requests.Session()
+    # Retry transient gateway/overload responses on the pooled connection;
+    # scraping only ever issues idempotent GETs
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False
+    )
+    # One pool per provider host, with a few sockets each for detailed-content fetches
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=8,
+        max_retries=retry
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# Shared session so repeated searches reuse TCP/TLS connections to the same sites
+_session = _create_session()
+
+def get_session():
+    """Get the shared requests session used for all scraping traffic"""
+    return _session
+
 def get_common_headers():
     """Get common headers for HTTP requests to avoid being blocked"""
     user_agents = [